@@ -0,0 +1,122 @@
+import os
+import numpy as np
+import kepler
+import integrators
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None and not hasattr(numba, 'prange'):
+    # prange and parallel=True arrived in numba 0.34
+    numba = None
+
+
+class NumpyBackend:
+    name = 'numpy'
+
+    def solve(self, ji, epsilon, tol=1e-14, max_iter=10):
+        return kepler.solve(ji, epsilon, tol, max_iter=max_iter)
+
+    def real_annomaly_deriv(self, theta, factor, epsilon):
+        return factor*(1 + epsilon*np.cos(theta))**2
+
+    def integrate_real_annomaly(self, factor, epsilon, t_0, theta_0, t_final,
+                                steps):
+        return integrators.rk4(
+            lambda t, theta: self.real_annomaly_deriv(theta, factor, epsilon),
+            t_0, theta_0, t_final, steps)
+
+
+if numba is not None:
+
+    @numba.njit(cache=True)
+    def solve_scalar(ji, epsilon, tol, max_iter):
+        reduced = ji - 2*np.pi*np.floor((ji + np.pi)/(2*np.pi))
+
+        alpha = (1 - epsilon)/(4*epsilon + 0.5)
+        beta = reduced/(2*(4*epsilon + 0.5))
+        sign = -1.0 if beta < 0 else 1.0
+        z = sign*abs(beta + sign*np.sqrt(beta**2 + alpha**3))**(1/3)
+        s = z - alpha/z
+        s = s - 0.078*s**5/(1 + epsilon)
+        u = reduced + epsilon*(3*s - 4*s**3)
+
+        for _ in range(max_iter):
+            sin_u = epsilon*np.sin(u)
+            f = u - sin_u - reduced
+            f1 = 1 - epsilon*np.cos(u)
+            d1 = -f/f1
+            d2 = -f/(f1 + d1*sin_u/2)
+            delta = -f/(f1 + d2*sin_u/2 + d2**2*(1 - f1)/6)
+            u += delta
+            if abs(delta) <= tol:
+                break
+
+        return u + ji - reduced
+
+    @numba.njit(cache=True, parallel=True)
+    def solve_kernel(ji, epsilon, tol, max_iter, out):
+        for k in numba.prange(ji.size):
+            out[k] = solve_scalar(ji[k], epsilon[k], tol, max_iter)
+
+    @numba.njit(cache=True)
+    def real_annomaly_deriv_kernel(theta, factor, epsilon):
+        return factor*(1 + epsilon*np.cos(theta))**2
+
+    @numba.njit(cache=True)
+    def rk4_real_annomaly_kernel(factor, epsilon, t_0, theta_0, t_final,
+                                 steps):
+        h = (t_final - t_0)/steps
+        theta = theta_0
+        for _ in range(steps):
+            k_1 = real_annomaly_deriv_kernel(theta, factor, epsilon)
+            k_2 = real_annomaly_deriv_kernel(theta + k_1*h/2, factor, epsilon)
+            k_3 = real_annomaly_deriv_kernel(theta + k_2*h/2, factor, epsilon)
+            k_4 = real_annomaly_deriv_kernel(theta + k_3*h, factor, epsilon)
+            theta += (k_1 + 2*(k_2 + k_3) + k_4)*(h/6)
+        return theta
+
+
+class NumbaBackend(NumpyBackend):
+    name = 'numba'
+
+    def solve(self, ji, epsilon, tol=1e-14, max_iter=10):
+        ji = np.asarray(ji, dtype=float)
+        epsilon = np.asarray(epsilon, dtype=float)
+        shape = np.broadcast(ji, epsilon).shape
+        ji = np.ascontiguousarray(np.broadcast_to(ji, shape)).ravel()
+        epsilon = np.ascontiguousarray(np.broadcast_to(epsilon, shape)).ravel()
+        out = np.empty(ji.shape)
+        solve_kernel(ji, epsilon, tol, max_iter, out)
+        return out.reshape(shape)
+
+    def integrate_real_annomaly(self, factor, epsilon, t_0, theta_0, t_final,
+                                steps):
+        return rk4_real_annomaly_kernel(float(factor), float(epsilon),
+                                        float(t_0), float(theta_0),
+                                        float(t_final), int(steps))
+
+
+backends = {'numpy': NumpyBackend()}
+if numba is not None:
+    backends['numba'] = NumbaBackend()
+
+current = backends['numpy']
+
+
+def use(name):
+    global current
+    if name not in backends:
+        raise ValueError("Backend no disponible: {}".format(name))
+    current = backends[name]
+    return current
+
+
+def get():
+    return current
+
+
+if os.environ.get('CELESTE_BACKEND') in backends:
+    use(os.environ['CELESTE_BACKEND'])
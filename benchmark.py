@@ -0,0 +1,584 @@
+import base64
+import gzip
+import json
+import os
+import tempfile
+import time
+import numpy as np
+import kepler
+
+
+def legacy_eccentric_annomaly(period, epsilon, time, tol, max_iter=100):
+    ji = 2*np.pi*time/period
+    samples = 0
+    u_1 = -1
+    if time < period/2:
+        low, high = 0, np.pi
+    else:
+        low, high = np.pi, 2*np.pi
+    while u_1 < low or u_1 > high:
+        u_0 = np.random.uniform(low, high)
+        num = (-u_0*np.cos(u_0) + np.sin(u_0))*epsilon + ji
+        u_1 = num/(1-epsilon*np.cos(u_0))
+        samples += 1
+
+    curr_u = next_u = u_1
+    iterations = 0
+    dist = np.inf
+    while dist > tol and iterations < max_iter:
+        curr_u = next_u
+        numer = (-curr_u*np.cos(curr_u) + np.sin(curr_u))*epsilon + ji
+        next_u = numer/(1-epsilon*np.cos(curr_u))
+        dist = abs(curr_u - next_u)
+        iterations += 1
+
+    return next_u, samples, iterations
+
+
+def compare_kepler_starters(eccentricities=None, ntimes=200, tol=1e-12,
+                            seed=0):
+    if eccentricities is None:
+        eccentricities = np.linspace(0, 0.99, 12)
+    np.random.seed(seed)
+    times = np.linspace(0, 1, ntimes, endpoint=False)
+    ji = 2*np.pi*times
+
+    results = []
+    for epsilon in eccentricities:
+        legacy = np.array([legacy_eccentric_annomaly(1, epsilon, t, tol)
+                           for t in times])
+        u, iterations = kepler.solve(ji, epsilon, tol, full_output=True)
+        results.append({
+            'epsilon': float(epsilon),
+            'legacy_samples_mean': float(legacy[:, 1].mean()),
+            'legacy_samples_max': int(legacy[:, 1].max()),
+            'legacy_iterations_mean': float(legacy[:, 2].mean()),
+            'legacy_iterations_max': int(legacy[:, 2].max()),
+            'legacy_max_error': float(np.abs(
+                legacy[:, 0] - epsilon*np.sin(legacy[:, 0]) - ji).max()),
+            'iterations_mean': float(iterations.mean()),
+            'iterations_max': int(iterations.max()),
+            'max_error': float(np.abs(u - epsilon*np.sin(u) - ji).max()),
+        })
+
+    return results
+
+
+def print_kepler_starters(results):
+    print("{:>6} {:>14} {:>14} {:>12} {:>14} {:>12}".format(
+        "e", "muestras (ant)", "iters (ant)", "error (ant)",
+        "iters (nuevo)", "error (nuevo)"))
+    for r in results:
+        print("{:6.3f} {:14.2f} {:8.2f}/{:<5d} {:12.2e} {:8.2f}/{:<5d} {:12.2e}"
+              .format(r['epsilon'],
+                      r['legacy_samples_mean'],
+                      r['legacy_iterations_mean'],
+                      r['legacy_iterations_max'],
+                      r['legacy_max_error'],
+                      r['iterations_mean'],
+                      r['iterations_max'],
+                      r['max_error']))
+
+
+def load_binary_figure(path):
+    with open(path) as f:
+        fig = json.load(f)
+    positions = fig['markers']['positions']
+    values = np.frombuffer(base64.b64decode(positions['bdata']),
+                           dtype='<' + positions['dtype'])
+    nplanets = len(fig['markers']['names'])
+    values = values.reshape(-1, nplanets, 3)
+    if positions['delta']:
+        values = np.cumsum(values, axis=0)*positions['scale']
+    return fig, values
+
+
+def compare_trace_encodings(times=None, decimals=5, repeat=3):
+    from display import SolarSystem
+
+    solar_system = SolarSystem()
+    if times is None:
+        times = np.arange(0, 36525, 5)
+    variants = [
+        ('json', dict(encoding='json')),
+        ('binary', dict(encoding='binary')),
+        ('binary-{}'.format(decimals),
+         dict(encoding='binary', decimals=decimals)),
+        ('binary-delta-{}'.format(decimals),
+         dict(encoding='binary', decimals=decimals, delta=True)),
+    ]
+
+    results = []
+    directory = tempfile.mkdtemp()
+    for name, options in variants:
+        path = os.path.join(directory, name + '.json')
+        start = time.time()
+        solar_system.write_animation(path, solar_system.inner, times,
+                                     name, **options)
+        write_time = time.time() - start
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        load_times = []
+        for _ in range(repeat):
+            start = time.time()
+            if options['encoding'] == 'json':
+                json.loads(raw.decode('utf-8'))
+            else:
+                load_binary_figure(path)
+            load_times.append(time.time() - start)
+        os.remove(path)
+
+        results.append({
+            'encoding': name,
+            'bytes': len(raw),
+            'gzip_bytes': len(gzip.compress(raw)),
+            'write_seconds': write_time,
+            'load_seconds': min(load_times),
+        })
+    os.rmdir(directory)
+
+    return results
+
+
+def print_trace_encodings(results):
+    print("{:>20} {:>12} {:>12} {:>10} {:>10}".format(
+        "codificación", "bytes", "gzip", "escritura", "carga"))
+    for r in results:
+        print("{:>20} {:12d} {:12d} {:9.3f}s {:9.3f}s".format(
+            r['encoding'], r['bytes'], r['gzip_bytes'],
+            r['write_seconds'], r['load_seconds']))
+
+
+def compare_orbit_sampling(pixel_error=0.5, width=600, npoints=200):
+    from display import SolarSystem, pixel_tolerance, to_json
+
+    results = []
+    for planet in SolarSystem().planets:
+        rng = int(1.2*planet.a) + 1
+        tol = pixel_tolerance(pixel_error, rng, width)
+        uniform = planet.get_orbit(npoints)
+        adaptive = planet.get_adaptive_orbit(tol)
+        results.append({
+            'planet': planet.name,
+            'tolerance': tol,
+            'uniform_vertices': len(uniform),
+            'adaptive_vertices': len(adaptive),
+            'uniform_bytes': len(to_json(uniform.tolist())),
+            'adaptive_bytes': len(to_json(adaptive.tolist())),
+        })
+
+    return results
+
+
+def print_orbit_sampling(results):
+    print("{:>10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+        "planeta", "tol (UA)", "vért. (u)", "vért. (a)",
+        "bytes (u)", "bytes (a)"))
+    for r in results:
+        print("{:>10} {:10.2e} {:10d} {:10d} {:10d} {:10d}".format(
+            r['planet'], r['tolerance'], r['uniform_vertices'],
+            r['adaptive_vertices'], r['uniform_bytes'], r['adaptive_bytes']))
+
+
+def reference_eccentric_annomaly(ji, epsilon, iterations=60):
+    ji = np.asarray(ji, dtype=np.longdouble)
+    epsilon = np.longdouble(epsilon)
+    u = ji + epsilon*np.sin(ji)
+    for _ in range(iterations):
+        u = u - (u - epsilon*np.sin(u) - ji)/(1 - epsilon*np.cos(u))
+    return u
+
+
+def reference_real_annomaly(ji, epsilon):
+    u = reference_eccentric_annomaly(ji, epsilon)
+    theta = 2*np.arctan2(np.sqrt(1 + epsilon)*np.sin(u/2),
+                         np.sqrt(1 - epsilon)*np.cos(u/2))
+    return np.mod(theta, 2*np.pi)
+
+
+def angle_error(value, reference):
+    diff = np.mod(np.asarray(value, dtype=np.longdouble) - reference + np.pi,
+                  2*np.pi) - np.pi
+    return float(np.abs(diff).max())
+
+
+SOLVERS = [
+    ('newton', 'eccentric', 0,
+     lambda planet, t: planet.eccentric_annomaly(t),
+     lambda planet, ts: planet.eccentric_annomalies(ts)),
+    ('bessel-20', 'eccentric', 0,
+     lambda planet, t: planet.eccentric_annomaly_bessel(t, 20),
+     lambda planet, ts: planet.eccentric_annomalies_bessel(ts, 20)),
+    ('bessel-auto', 'eccentric', 0,
+     lambda planet, t: planet.eccentric_annomaly_bessel(t),
+     lambda planet, ts: planet.eccentric_annomalies_bessel(ts)),
+    ('kepler', 'real', 0,
+     lambda planet, t: planet.real_annomaly(t),
+     lambda planet, ts: planet.real_annomalies(ts)),
+    ('integrate', 'real', 0,
+     lambda planet, t: planet.real_annomaly(t, 'integrate'),
+     lambda planet, ts: planet.integrated_real_annomaly(ts)),
+    ('rk4', 'real', 10,
+     lambda planet, t: planet.real_annomaly(t, 'rk4'),
+     None),
+]
+
+
+def benchmark_solver(planet, solver, times):
+    name, kind, max_calls, scalar, batch = solver
+    calls = times[:max_calls] if max_calls else times
+    ji = 2*np.pi*np.mod(calls, planet.period)/planet.period
+    if kind == 'eccentric':
+        reference = reference_eccentric_annomaly(ji, planet.epsilon)
+    else:
+        reference = reference_real_annomaly(ji, planet.epsilon)
+
+    latencies = []
+    values = []
+    for t in calls:
+        start = time.perf_counter()
+        values.append(scalar(planet, t))
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies)
+
+    result = {
+        'solver': name,
+        'anomaly': kind,
+        'planet': planet.name,
+        'epsilon': planet.epsilon,
+        'calls': len(calls),
+        'calls_per_second': len(calls)/latencies.sum(),
+        'median_latency': float(np.median(latencies)),
+        'p99_latency': float(np.percentile(latencies, 99)),
+        'max_error': angle_error(values, reference),
+    }
+
+    if batch is not None:
+        start = time.perf_counter()
+        batch(planet, calls)
+        result['batch_evaluations_per_second'] = (
+            len(calls)/(time.perf_counter() - start))
+
+    return result
+
+
+def solver_benchmark(eccentricities=(0, 0.1, 0.3, 0.5, 0.7, 0.9, 0.99),
+                     ntimes=200, solvers=SOLVERS):
+    from display import SolarSystem
+    from planet import Planet
+
+    planets = list(SolarSystem().planets)
+    planets += [Planet('e={}'.format(epsilon), epsilon, 1, 365.26, 0, 0, 0, 0)
+                for epsilon in eccentricities]
+
+    results = []
+    for planet in planets:
+        times = np.linspace(0, 3*planet.period, ntimes, endpoint=False)
+        for solver in solvers:
+            results.append(benchmark_solver(planet, solver, times))
+
+    return results
+
+
+def write_solver_benchmark(path='benchmark_results.json', **kwargs):
+    import platform
+    import scipy
+
+    report = {
+        'version': 1,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'results': solver_benchmark(**kwargs),
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=1)
+    return report
+
+
+def print_solver_benchmark(results):
+    print("{:>12} {:>12} {:>8} {:>12} {:>12} {:>12} {:>10}".format(
+        "método", "planeta", "e", "llamadas/s", "mediana", "p99",
+        "error máx"))
+    for r in results:
+        print("{:>12} {:>12} {:8.3f} {:12.0f} {:11.2e}s {:11.2e}s {:10.2e}"
+              .format(r['solver'], r['planet'], r['epsilon'],
+                      r['calls_per_second'], r['median_latency'],
+                      r['p99_latency'], r['max_error']))
+
+
+def parallel_scaling(workers=(1, 2, 4, 8), ntimes=200000, model='2bodies'):
+    from display import SolarSystem
+    import parallel
+
+    planets = list(SolarSystem().planets)
+    times = np.linspace(0, 36525, ntimes)
+
+    start = time.time()
+    reference = np.array([parallel.evaluate(planet, times, model)
+                          for planet in planets])
+    serial = time.time() - start
+
+    results = [{'workers': 0, 'seconds': serial, 'speedup': 1.0}]
+    for count in workers:
+        start = time.time()
+        result = parallel.parallel_ephemeris(planets, times, model, count)
+        elapsed = time.time() - start
+        assert np.allclose(result, reference)
+        results.append({'workers': count, 'seconds': elapsed,
+                        'speedup': serial/elapsed})
+
+    return results
+
+
+def print_parallel_scaling(results):
+    print("{:>8} {:>10} {:>8}".format("procesos", "tiempo", "speedup"))
+    for r in results:
+        print("{:>8} {:9.3f}s {:8.2f}".format(
+            r['workers'] or 'serie', r['seconds'], r['speedup']))
+
+
+def nbody_drift(years=1000, samples=21, steps=(5, 10, 20, 40)):
+    from display import SolarSystem
+
+    system = SolarSystem().nbody(SolarSystem().outer_planets)
+    times = np.linspace(0, 365.25*years, samples)
+    kepler_positions = system.planets[0].positions(times)
+
+    results = []
+    for h in steps:
+        start = time.time()
+        positions, _, energies = system.propagate(times, h)
+        elapsed = time.time() - start
+        drift = (energies - energies[0])/abs(energies[0])
+        jupiter = positions[:, 1] - positions[:, 0]
+        results.append({
+            'h': h,
+            'seconds': elapsed,
+            'energy_drift': float(np.abs(drift).max()),
+            'jupiter_offset': float(np.linalg.norm(
+                jupiter - kepler_positions, axis=-1).max()),
+        })
+
+    return results
+
+
+def print_nbody_drift(results):
+    print("{:>6} {:>10} {:>12} {:>12}".format(
+        "paso", "tiempo", "deriva E", "Júpiter UA"))
+    for r in results:
+        print("{:>6} {:9.3f}s {:12.2e} {:12.4f}".format(
+            r['h'], r['seconds'], r['energy_drift'], r['jupiter_offset']))
+
+
+def compare_backends(ntimes=10**6, epsilon=0.5, steps=5000):
+    import backend
+
+    ji = np.linspace(0, 200*np.pi, ntimes)
+    results = []
+    for name, engine in sorted(backend.backends.items()):
+        start = time.time()
+        engine.solve(ji[:2], epsilon)
+        engine.integrate_real_annomaly(0.01, epsilon, 0, 0, 1, 1)
+        warmup = time.time() - start
+
+        start = time.time()
+        engine.solve(ji, epsilon)
+        solve = time.time() - start
+
+        start = time.time()
+        engine.integrate_real_annomaly(0.01, epsilon, 0, 0, 300, steps)
+        rk4 = time.time() - start
+
+        results.append({'backend': name, 'warmup': warmup,
+                        'solve': solve, 'rk4': rk4})
+
+    return results
+
+
+def print_backends(results):
+    print("{:>8} {:>10} {:>10} {:>10}".format(
+        "backend", "arranque", "kepler", "rk4"))
+    for r in results:
+        print("{:>8} {:9.4f}s {:9.4f}s {:9.4f}s".format(
+            r['backend'], r['warmup'], r['solve'], r['rk4']))
+
+
+def compare_warm_start(grids=(range(0, 700, 10), range(0, 61000, 1000),
+                              np.linspace(0, 3650, 36501)), tol=1e-14):
+    from display import SolarSystem
+
+    system = SolarSystem()
+    size = len(system.planets)
+    results = []
+    for grid in grids:
+        times = np.asarray(grid, dtype=float)
+        # same stopping rule as kepler.continuation
+        cold, cold_iterations = kepler.solve(
+            2*np.pi*times/system.planets.period.reshape(-1, 1),
+            system.planets.epsilon.reshape(-1, 1), tol**(1/3),
+            full_output=True)
+        warm = np.empty_like(cold)
+        warm_iterations = 0
+        for j, (_, ecc_an, iterations) in enumerate(
+                system.iter_eccentric_annomalies(times, tol=tol)):
+            warm[:, j] = ecc_an
+            warm_iterations += iterations.sum()
+        results.append({'times': len(times),
+                        'step': float(times[1] - times[0]),
+                        'cold': cold_iterations.sum()/(len(times)*size),
+                        'warm': warm_iterations/(len(times)*size),
+                        'difference': float(np.abs(warm - cold).max())})
+
+    return results
+
+
+def print_warm_start(results):
+    print("{:>8} {:>8} {:>10} {:>10} {:>10}".format(
+        "tiempos", "paso", "iter frío", "iter cont.", "diferencia"))
+    for r in results:
+        print("{:>8} {:8g} {:10.2f} {:10.2f} {:10.1e}".format(
+            r['times'], r['step'], r['cold'], r['warm'], r['difference']))
+
+
+def compare_chebyshev(years=100, tol=1e-9, ntimes=200000, model='3d'):
+    from display import SolarSystem
+    import chebyshev
+
+    span = 365.25*years
+    times = np.random.RandomState(0).uniform(0, span, ntimes)
+    results = []
+    for planet in SolarSystem().planets:
+        start = time.time()
+        ephemeris = chebyshev.ChebyshevEphemeris.for_planet(
+            planet, 0, span, tol, model)
+        build = time.time() - start
+
+        start = time.time()
+        values = ephemeris(times)
+        evaluate = time.time() - start
+
+        start = time.time()
+        reference = chebyshev.planet_function(planet, model)(times)
+        kepler_time = time.time() - start
+
+        half = ephemeris.dim//2
+        results.append({
+            'planet': planet.name,
+            'segments': len(ephemeris.coefs),
+            'bytes': ephemeris.coefs.nbytes,
+            'position_error': float(np.abs(values[:, :half] -
+                                           reference[:, :half]).max()),
+            'speed_error': float(np.abs(values[:, half:] -
+                                        reference[:, half:]).max()),
+            'build': build,
+            'chebyshev': evaluate,
+            'kepler': kepler_time,
+        })
+
+    return results
+
+
+def print_chebyshev(results):
+    print("{:>10} {:>6} {:>9} {:>10} {:>10} {:>8} {:>8}".format(
+        "planeta", "segm.", "bytes", "err pos", "err vel", "cheb", "kepler"))
+    for r in results:
+        print("{:>10} {:6d} {:9d} {:10.1e} {:10.1e} {:7.3f}s {:7.3f}s".format(
+            r['planet'], r['segments'], r['bytes'], r['position_error'],
+            r['speed_error'], r['chebyshev'], r['kepler']))
+
+
+def compare_event_search(years=100, resolution=0.01):
+    from display import SolarSystem
+    import events
+
+    system = SolarSystem()
+    earth, mars = system.inner_planets[2], system.inner_planets[3]
+    span = 365.25*years
+
+    start = time.time()
+    found = events.closest_approaches(mars, earth, 0, span)
+    search = time.time() - start
+
+    start = time.time()
+    times = np.arange(0, span, resolution)
+    distance = np.concatenate([
+        np.linalg.norm(mars.positions(chunk) - earth.positions(chunk),
+                       axis=-1)
+        for chunk in np.array_split(times, max(1, len(times)//100000))])
+    minima = np.flatnonzero((distance[1:-1] < distance[:-2]) &
+                            (distance[1:-1] < distance[2:])) + 1
+    brute = time.time() - start
+
+    error = max(abs(event.time - times[i]) for event, i in zip(found, minima))
+    return {'events': len(found), 'grid_minima': len(minima),
+            'search': search, 'brute_force': brute, 'points': len(times),
+            'max_difference': error}
+
+
+def print_event_search(result):
+    print("Máximas aproximaciones Marte-Tierra: {} (rejilla: {})".format(
+        result['events'], result['grid_minima']))
+    print("Búsqueda: {:.3f}s, fuerza bruta ({} puntos): {:.3f}s".format(
+        result['search'], result['points'], result['brute_force']))
+    print("Diferencia máxima: {:.2e} días".format(result['max_difference']))
+
+
+def compare_observer_pipeline(ntimes=36525, loop_times=200):
+    from display import SolarSystem
+    import observer
+
+    system = SolarSystem()
+    earth = system.inner_planets[2]
+    targets = [planet for planet in system.planets if planet is not earth]
+    times = np.arange(ntimes, dtype=float)
+
+    start = time.time()
+    batch = system.observe(times, earth, targets)
+    batch_time = time.time() - start
+
+    start = time.time()
+    error = 0
+    for j, t in enumerate(times[:loop_times]):
+        for i, planet in enumerate(targets):
+            delay = 0
+            for _ in range(5):
+                vector = planet.position(t - delay) - earth.position(t)
+                delay = np.linalg.norm(vector)/observer.SPEED_OF_LIGHT
+            error = max(error, np.abs(vector - batch.vectors[i, j]).max())
+    loop_time = (time.time() - start)*ntimes/loop_times
+
+    return {'epochs': ntimes, 'targets': len(targets), 'batch': batch_time,
+            'loop_estimate': loop_time, 'max_difference': error}
+
+
+def print_observer_pipeline(result):
+    print("{} épocas x {} planetas: lote {:.3f}s, bucle ~{:.1f}s".format(
+        result['epochs'], result['targets'], result['batch'],
+        result['loop_estimate']))
+    print("Diferencia máxima: {:.2e} UA".format(result['max_difference']))
+
+
+if __name__ == '__main__':
+    print_kepler_starters(compare_kepler_starters())
+    print()
+    print_trace_encodings(compare_trace_encodings())
+    print()
+    print_orbit_sampling(compare_orbit_sampling())
+    print()
+    print_solver_benchmark(write_solver_benchmark()['results'])
+    print()
+    print_parallel_scaling(parallel_scaling())
+    print()
+    print_nbody_drift(nbody_drift())
+    print()
+    print_backends(compare_backends())
+    print()
+    print_warm_start(compare_warm_start())
+    print()
+    print_chebyshev(compare_chebyshev())
+    print()
+    print_event_search(compare_event_search())
+    print()
+    print_observer_pipeline(compare_observer_pipeline())
@@ -0,0 +1,116 @@
+import numpy as np
+
+
+def chebyshev_nodes(degree):
+    return np.cos(np.pi*(np.arange(degree + 1) + 0.5)/(degree + 1))
+
+
+def chebyshev_matrix(degree):
+    k = np.arange(degree + 1) + 0.5
+    j = np.arange(degree + 1).reshape(-1, 1)
+    matrix = 2*np.cos(np.pi*j*k/(degree + 1))/(degree + 1)
+    matrix[0] /= 2
+    return matrix
+
+
+def chebyshev_basis(x, degree):
+    x = np.asarray(x, dtype=float)
+    basis = np.empty((degree + 1,) + x.shape)
+    basis[0] = 1
+    if degree > 0:
+        basis[1] = x
+    for j in range(2, degree + 1):
+        basis[j] = 2*x*basis[j - 1] - basis[j - 2]
+    return np.moveaxis(basis, 0, -1)
+
+
+def planet_function(planet, model='3d'):
+    if model == '2bodies':
+        return lambda times: np.concatenate(
+            [planet.positions_2bodies(times), planet.speeds_2bodies(times)],
+            axis=-1)
+    if model == '2d':
+        return lambda times: np.concatenate(
+            [planet.positions_2d(times), planet.speeds_2d(times)], axis=-1)
+    return lambda times: np.concatenate(
+        [planet.positions(times), planet.speeds(times)], axis=-1)
+
+
+class ChebyshevEphemeris:
+
+    def __init__(self, t_start, segment_length, coefs):
+        self.t_start = t_start
+        self.segment_length = segment_length
+        self.coefs = np.asarray(coefs)
+        self.t_end = t_start + segment_length*len(self.coefs)
+        self.dim = self.coefs.shape[-1]
+        self.error = None
+
+    @classmethod
+    def fit(cls, func, t_start, t_end, tol=1e-9, degree=12,
+            segment_length=None, max_segments=2**16):
+        nodes = chebyshev_nodes(degree)
+        matrix = chebyshev_matrix(degree)
+        checks = np.cos(np.pi*np.arange(degree + 2)/(degree + 1))
+        span = t_end - t_start
+        nsegments = 1 if segment_length is None else int(
+            np.ceil(span/segment_length))
+
+        while True:
+            length = span/nsegments
+            starts = t_start + length*np.arange(nsegments).reshape(-1, 1)
+            values = func(starts + length*(nodes + 1)/2)
+            coefs = np.einsum('jk,skd->sjd', matrix, values)
+
+            expected = func(starts + length*(checks + 1)/2)
+            approx = np.einsum('mj,sjd->smd',
+                               chebyshev_basis(checks, degree), coefs)
+            error = np.abs(approx - expected).max()
+            if error <= tol or 2*nsegments > max_segments:
+                break
+            nsegments *= 2
+
+        ephemeris = cls(t_start, length, coefs)
+        ephemeris.error = error
+        return ephemeris
+
+    @classmethod
+    def for_planet(cls, planet, t_start, t_end, tol=1e-9, model='3d',
+                   **kwargs):
+        return cls.fit(planet_function(planet, model), t_start, t_end, tol,
+                       **kwargs)
+
+    def __call__(self, times):
+        times = np.asarray(times, dtype=float)
+        slack = 1e-12*max(1, abs(self.t_start), abs(self.t_end))
+        if np.any((times < self.t_start - slack) |
+                  (times > self.t_end + slack)):
+            raise ValueError("Tiempos fuera del intervalo ajustado "
+                             "[{}, {}]".format(self.t_start, self.t_end))
+        offset = (times - self.t_start)/self.segment_length
+        index = np.clip(np.floor(offset).astype(int), 0, len(self.coefs) - 1)
+        x = 2*(offset - index) - 1
+        basis = chebyshev_basis(x, self.coefs.shape[1] - 1)
+        return np.einsum('...j,...jd->...d', basis, self.coefs[index])
+
+    def positions(self, times):
+        return self(times)[..., :self.dim//2]
+
+    def speeds(self, times):
+        return self(times)[..., self.dim//2:]
+
+    def position(self, time):
+        return self.positions(time)
+
+    def speed(self, time):
+        return self.speeds(time)
+
+    def save(self, path):
+        np.savez(path, t_start=self.t_start,
+                 segment_length=self.segment_length, coefs=self.coefs)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(float(data['t_start']), float(data['segment_length']),
+                   data['coefs'])
@@ -0,0 +1,116 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import ipywidgets as wdgs
+import plotly.offline as py
+import plotly.graph_objs as go
+from IPython.display import clear_output
+from display import Displayer, SolarSystem
+
+
+class LatestOnly:
+    def __init__(self, compute, render, delay=0.3, executor=None, loop=None):
+        self.compute = compute
+        self.render = render
+        self.delay = delay
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+        self.loop = loop or asyncio.get_event_loop()
+        self.generation = 0
+        self.handle = None
+        self.future = None
+
+    def request(self, *args):
+        self.generation += 1
+        if self.handle is not None:
+            self.handle.cancel()
+        self.handle = self.loop.call_later(self.delay, self.start,
+                                           self.generation, args)
+
+    def start(self, generation, args):
+        self.handle = None
+        if self.future is not None and not self.future.done():
+            self.future.cancel()
+        self.future = self.loop.run_in_executor(self.executor, self.compute,
+                                                *args)
+        self.future.add_done_callback(functools.partial(self.finish,
+                                                        generation))
+
+    def finish(self, generation, future):
+        if generation != self.generation or future.cancelled():
+            return
+        self.render(future.result())
+
+
+def default_pickers():
+    planets = OrderedDict((planet.name, planet)
+                          for planet in SolarSystem().planets)
+    return (wdgs.Dropdown(options=planets, description="Planeta"),
+            wdgs.FloatText(value=1, description="Día", disabled=False))
+
+
+class Panel:
+    def __init__(self, displayer=None, planet_picker=None, day_picker=None,
+                 delay=0.3, executor=None):
+        self.displayer = displayer or Displayer()
+        if planet_picker is None or day_picker is None:
+            planet_picker, day_picker = default_pickers()
+        self.planet_picker = planet_picker
+        self.day_picker = day_picker
+        self.task = LatestOnly(self.compute, self.render, delay, executor)
+
+        self.widget = wdgs.VBox([
+            wdgs.HBox([self.planet_picker, self.day_picker]),
+            self.view
+        ])
+
+        self.planet_picker.observe(self.update, names='value')
+        self.day_picker.observe(self.update, names='value')
+        self.update()
+
+    def update(self, change=None):
+        self.task.request(self.planet_picker.value, self.day_picker.value)
+
+
+class InformationPanel(Panel):
+    def __init__(self, *args, **kwargs):
+        self.view = wdgs.Output()
+        Panel.__init__(self, *args, **kwargs)
+
+    def compute(self, planet, time):
+        return self.displayer.information(planet, time, method='rk4')
+
+    def render(self, text):
+        with self.view:
+            clear_output(wait=True)
+            print(text)
+
+
+class OrbitPanel(Panel):
+    def __init__(self, *args, **kwargs):
+        if hasattr(go, 'FigureWidget'):
+            self.view = go.FigureWidget()
+        else:
+            self.view = wdgs.Output()
+        Panel.__init__(self, *args, **kwargs)
+
+    def compute(self, planet, time):
+        return self.displayer.orbit_figure(planet, time)
+
+    def render(self, fig):
+        if not hasattr(go, 'FigureWidget'):
+            with self.view:
+                clear_output(wait=True)
+                py.iplot(fig, filename='plots/orbit_plot')
+            return
+
+        with self.view.batch_update():
+            if len(self.view.data) != len(fig.data):
+                self.view.data = []
+                self.view.add_traces(fig.data)
+            else:
+                for trace, new_trace in zip(self.view.data, fig.data):
+                    new_trace = new_trace.to_plotly_json()
+                    new_trace.pop('type', None)
+                    trace.update(new_trace)
+            self.view.layout.update(fig.layout)
@@ -1,12 +1,21 @@
+from collections import OrderedDict
+import base64
+import json
+import plotly
 import plotly.offline as py
 import plotly.graph_objs as go
-from planet import Planet
+from planet import Planet, PlanetSet
+import nbody
+import chebyshev
+import events
+import observer as observer_module
 import numpy as np
 
 
 class SolarSystem:
 
-    def __init__(self):
+    def __init__(self, store=None):
+        self.store = store
         self.inner_planets = [
             Planet("Mercurio", 0.206, 0.387, 87.97,
                    3.301e23, 7, 47.14, 75.9),
@@ -29,513 +38,474 @@ class SolarSystem:
                    1.024e26, 1.78, 130.68, 43.83)
         ]
 
-    def display_inner_planets(self):
-
-        steps = 10
-        orbits = [planet.get_orbit(60) for planet in self.inner_planets]
-        planets = [[planet.position(i) for i in range(0, 700, steps)]
-                   for planet in self.inner_planets]
-
-        rng = int(1.2*self.inner_planets[-1].a) + 1
-
-        axis3d = dict(
-            showbackground=True,
-            backgroundcolor="rgb(230, 230,230)",
-            gridcolor="rgb(255, 255, 255)",
-            zerolinecolor="rgb(255, 255, 255)",
-        )
-        
-        layout = dict(
-            width=600, height=500,
-            scene=dict(xaxis=(axis3d),
-                       yaxis=(axis3d),
-                       zaxis=dict(axis3d,
-                                  **dict(range=[-rng, rng],
-                                         autorange=False)),
-                       aspectratio=dict(x=1, y=1, z=1)),
-            title='Movimiento orbital de los planetas interiores',
-            hovermode='closest',
-            updatemenus=[
-                {
-                    'type': 'buttons',
-                    'buttons': [
-                        {
-                            'label': 'Iniciar',
-                            'method': 'animate',
-                            'args': [None, dict(
-                                frame=dict(duration=0),
-                                transition=dict(duration=100),
-                                fromcurrent=True,
-                            )],
-                        }
-                    ]
-                }
-            ]
-        )
-        data = [
-            dict(x=[0], y=[0], z=[0],
-                 type='scatter3d',
-                 mode='markers',
-                 marker=dict(
-                     size=10,
-                     color='rgba(230, 230, 0, .9)',
-                     line=dict(width=1, color='rgb(100,100,0)')
-                 ),
-                 name='Sol'),
-            dict(x=orbits[0][:, 0],
-                 y=orbits[0][:, 1],
-                 z=orbits[0][:, 2],
-                 type='scatter3d',
-                 mode='lines',
-                 line=dict(width=2, color='blue'),
-                 name="Órbita de Mercurio"),
-            dict(x=orbits[1][:, 0],
-                 y=orbits[1][:, 1],
-                 z=orbits[1][:, 2],
-                 type='scatter3d',
-                 mode='lines',
-                 line=dict(width=2, color='orange'),
-                 name="Órbita de Venus"),
-            dict(x=orbits[2][:, 0],
-                 y=orbits[2][:, 1],
-                 z=orbits[2][:, 2],
-                 type='scatter3d',
-                 mode='lines',
-                 line=dict(width=2, color='green'),
-                 name="Órbita de La Tierra"),
-            dict(x=orbits[3][:, 0],
-                 y=orbits[3][:, 1],
-                 z=orbits[3][:, 2],
-                 type='scatter3d',
-                 mode='lines',
-                 line=dict(width=2, color='red'),
-                 name="Órbita de Marte"),
-            dict(x=[planets[0][0][0]],
-                 y=[planets[0][0][1]],
-                 z=[planets[0][0][2]],
-                 type='scatter3d',
-                 mode='markers',
-                 marker=dict(
-                     size=5,
-                     color='rgba(0, 0, 150, .8)',
-                     line=dict(
-                         width=1,
-                         color='rgb(0, 0, 0)')),
-                 name="Mercurio: día 0"),
-            dict(x=[planets[1][0][0]],
-                 y=[planets[1][0][1]],
-                 z=[planets[1][0][2]],
-                 type='scatter3d',
-                 mode='markers',
-                 marker=dict(
-                     size=5,
-                     color='rgba(255, 140, 0, .8)',
-                     line=dict(
-                         width=1,
-                         color='rgb(0, 0, 0)')),
-                 name="Venus: día 0"),
-            dict(x=[planets[2][0][0]],
-                 y=[planets[2][0][1]],
-                 z=[planets[2][0][2]],
-                 type='scatter3d',
-                 mode='markers',
-                 marker=dict(
-                     size=5,
-                     color='rgba(0, 250, 0, .8)',
-                     line=dict(
-                         width=1,
-                         color='rgb(0, 0, 0)')),
-                 name="La Tierra: día 0"),
-            dict(x=[planets[3][0][0]],
-                 y=[planets[3][0][1]],
-                 z=[planets[3][0][2]],
-                 type='scatter3d',
-                 mode='markers',
-                 marker=dict(
-                     size=5,
-                     color='rgba(250, 0, 0, .8)',
-                     line=dict(
-                         width=1,
-                         color='rgb(0, 0, 0)')),
-                 name="Marte: día 0")
-        ]
+        self.inner = PlanetSet(self.inner_planets)
+        self.outer = PlanetSet(self.outer_planets)
+        self.planets = PlanetSet(self.inner_planets + self.outer_planets)
+
+    def ephemeris(self, times, planets=None, workers=None):
+        planets = self.planets if planets is None else planets
+        if workers is not None:
+            import parallel
+            return parallel.parallel_ephemeris(planets, times,
+                                               workers=workers)
+        if self.store is not None:
+            return self.store.get(planets, times).transpose(1, 0, 2)
+        if not isinstance(planets, PlanetSet):
+            planets = PlanetSet(planets)
+        return planets.positions(times)
+
+    def nbody(self, planets=None, t_0=0):
+        planets = self.planets if planets is None else planets
+        return nbody.NBodySystem(planets, t_0)
+
+    def chebyshev(self, t_start, t_end, tol=1e-9, model='3d', planets=None):
+        planets = self.planets if planets is None else planets
+        return OrderedDict(
+            (planet.name, chebyshev.ChebyshevEphemeris.for_planet(
+                planet, t_start, t_end, tol, model))
+            for planet in planets)
+
+    def events(self, t_start, t_end, observer=None, planets=None,
+               step=None):
+        observer = self.inner_planets[2] if observer is None else observer
+        planets = self.planets if planets is None else planets
+        found = []
+        for planet in planets:
+            found.extend(events.apsides(planet, t_start, t_end))
+            if planet is observer:
+                continue
+            found.extend(events.conjunctions(planet, observer,
+                                             t_start, t_end, step))
+            found.extend(events.closest_approaches(planet, observer,
+                                                   t_start, t_end, step))
+        return sorted(found, key=lambda event: event.time)
+
+    def observe(self, times, observer=None, targets=None, light_time=True):
+        observer = self.inner_planets[2] if observer is None else observer
+        if targets is None:
+            targets = [planet for planet in self.planets
+                       if planet is not observer]
+        if not isinstance(targets, PlanetSet):
+            targets = PlanetSet(targets)
+        return observer_module.observe(targets, observer, times, light_time)
+
+    def orbits(self, planets, rng, pixel_error=0.5):
+        if pixel_error is None:
+            return [planet.get_orbit(60) for planet in planets]
+        tol = pixel_tolerance(pixel_error, rng, 600)
+        return [planet.get_adaptive_orbit(tol) for planet in planets]
+
+    def animation_figure(self, planets, times, title, pixel_error=0.5):
+        rng = int(1.2*max(planet.a for planet in planets)) + 1
+        orbits = self.orbits(planets, rng, pixel_error)
+        positions = self.ephemeris(times, planets)
+        return build_animation(planets, times, orbits, positions, title, rng)
+
+    def iter_positions(self, planets, times, chunk_size=1000):
+        for start in range(0, len(times), chunk_size):
+            chunk = times[start:start + chunk_size]
+            yield chunk, self.ephemeris(chunk, planets)
+
+    def iter_eccentric_annomalies(self, times, planets=None, tol=1e-14):
+        planets = self.planets if planets is None else planets
+        if not isinstance(planets, PlanetSet):
+            planets = PlanetSet(planets)
+        for time, (ecc_an, iterations) in zip(
+                times, planets.iter_eccentric_annomalies(times, tol)):
+            yield time, ecc_an, iterations
+
+    def iter_frames(self, planets, times, marker_indices, chunk_size=1000):
+        for chunk, positions in self.iter_positions(planets, times,
+                                                    chunk_size):
+            for j, time in enumerate(chunk):
+                yield animation_frame(planets, positions[:, j], time,
+                                      marker_indices)
+
+    def write_animation(self, path, planets, times, title, chunk_size=1000,
+                        encoding='json', decimals=None, delta=False,
+                        pixel_error=0.5):
+        rng = int(1.2*max(planet.a for planet in planets)) + 1
+        orbits = self.orbits(planets, rng, pixel_error)
+        fig = build_animation(planets, times[:1], orbits,
+                              self.ephemeris(times[:1], planets), title, rng)
+        marker_indices = fig['frames'][0]['traces']
+        as_json = path.endswith('.json')
+
+        with open(path, 'w') as f:
+            if encoding == 'binary':
+                data = [encode_trace(trace, decimals) for trace in fig['data']]
+                markers = dict(names=[planet.name for planet in planets],
+                               traces=marker_indices,
+                               times=encode_array(times, dtype='<f8'))
+                chunks = (positions for _, positions in
+                          self.iter_positions(planets, times, chunk_size))
+                write_binary_figure(f, data, fig['layout'], markers, chunks,
+                                    decimals, delta, as_json)
+                return
+
+            frames = self.iter_frames(planets, times, marker_indices,
+                                      chunk_size)
+            if as_json:
+                write_figure_json(f, fig['data'], fig['layout'], frames)
+            else:
+                write_figure_html(f, fig['data'], fig['layout'], frames)
 
-        frames = [
-            dict(data=[
-                dict(x=[0], y=[0], z=[0],
-                     type='scatter3d',
-                     mode='markers',
-                     marker=dict(
-                         size=10,
-                         color='rgba(230, 230, 0, .9)',
-                         line=dict(width=1, color='rgb(100,100,0)')
-                     ),
-                     name='Sol'),
-                dict(x=orbits[0][:, 0],
-                     y=orbits[0][:, 1],
-                     z=orbits[0][:, 2],
-                     type='scatter3d',
-                     mode='lines',
-                     line=dict(width=2, color='blue'),
-                     name="Órbita de Mercurio"),
-                dict(x=orbits[1][:, 0],
-                     y=orbits[1][:, 1],
-                     z=orbits[1][:, 2],
-                     type='scatter3d',
-                     mode='lines',
-                     line=dict(width=2, color='orange'),
-                     name="Órbita de Venus"),
-                dict(x=orbits[2][:, 0],
-                     y=orbits[2][:, 1],
-                     z=orbits[2][:, 2],
-                     type='scatter3d',
-                     mode='lines',
-                     line=dict(width=2, color='green'),
-                     name="Órbita de La Tierra"),
-                dict(x=orbits[3][:, 0],
-                     y=orbits[3][:, 1],
-                     z=orbits[3][:, 2],
-                     type='scatter3d',
-                     mode='lines',
-                     line=dict(width=2, color='red'),
-                     name="Órbita de Marte"),
-                dict(x=[planets[0][i][0]],
-                     y=[planets[0][i][1]],
-                     z=[planets[0][i][2]],
-                     type='scatter3d',
-                     mode='markers',
-                     marker=dict(
-                         size=5,
-                         color='rgba(0, 0, 150, .8)',
-                         line=dict(
-                             width=1,
-                             color='rgb(0, 0, 0)')),
-                     name="Mercurio: día {}".format(steps*i)),
-                dict(x=[planets[1][i][0]],
-                     y=[planets[1][i][1]],
-                     z=[planets[1][i][2]],
-                     type='scatter3d',
-                     mode='markers',
-                     marker=dict(
-                         size=5,
-                         color='rgba(255, 140, 0, .8)',
-                         line=dict(
-                             width=1,
-                             color='rgb(0, 0, 0)')),
-                     name="Venus: día {}".format(steps*i)),
-                dict(x=[planets[2][i][0]],
-                     y=[planets[2][i][1]],
-                     z=[planets[2][i][2]],
-                     type='scatter3d',
-                     mode='markers',
-                     marker=dict(
-                         size=5,
-                         color='rgba(0, 250, 0, .8)',
-                         line=dict(
-                             width=1,
-                             color='rgb(0, 0, 0)')),
-                     name="La Tierra: día {}".format(steps*i)),
-                dict(x=[planets[3][i][0]],
-                     y=[planets[3][i][1]],
-                     z=[planets[3][i][2]],
-                     type='scatter3d',
-                     mode='markers',
-                     marker=dict(
-                         size=5,
-                         color='rgba(250, 0, 0, .8)',
-                         line=dict(
-                             width=1,
-                             color='rgb(0, 0, 0)')),
-                     name="Marte: día {}".format(steps*i)),
-                ]) for i in range(len(planets[0]))]
-        
-        fig = dict(data=data, layout=layout, frames=frames)
+    def display_inner_planets(self):
+        fig = self.animation_figure(
+            self.inner, np.arange(0, 700, 10),
+            'Movimiento orbital de los planetas interiores')
         py.iplot(fig, filename='plots/inner_planets_plot')
 
     def display_outer_planets(self):
+        fig = self.animation_figure(
+            self.outer, np.arange(0, 61000, 1000),
+            'Movimiento orbital de los planetas exteriores')
+        py.iplot(fig, filename='plots/outer_planets_plot')
 
-        steps = 1000
-        orbits = [planet.get_orbit(60) for planet in self.outer_planets]
-        planets = [[planet.position(i) for i in range(0, 61000, steps)]
-                   for planet in self.outer_planets]
 
-        rng = int(1.2*self.outer_planets[-1].a) + 1
+def pixel_tolerance(pixel_error, rng, width):
+    return pixel_error*2*rng/width
+
+
+ORBIT_COLORS = ['blue', 'orange', 'green', 'red']
+
+MARKER_COLORS = ['rgba(0, 0, 150, .8)', 'rgba(255, 140, 0, .8)',
+                 'rgba(0, 250, 0, .8)', 'rgba(250, 0, 0, .8)']
+
+
+def sun_trace():
+    return dict(x=[0], y=[0], z=[0],
+                type='scatter3d',
+                mode='markers',
+                marker=dict(
+                    size=10,
+                    color='rgba(230, 230, 0, .9)',
+                    line=dict(width=1, color='rgb(100,100,0)')
+                ),
+                name='Sol')
+
+
+def orbit_trace(planet, orbit, index):
+    return dict(x=orbit[:, 0],
+                y=orbit[:, 1],
+                z=orbit[:, 2],
+                type='scatter3d',
+                mode='lines',
+                line=dict(width=2,
+                          color=ORBIT_COLORS[index % len(ORBIT_COLORS)]),
+                name="Órbita de {}".format(planet.name))
+
+
+def marker_trace(planet, position, time, index):
+    return dict(x=[position[0]],
+                y=[position[1]],
+                z=[position[2]],
+                type='scatter3d',
+                mode='markers',
+                marker=dict(
+                    size=5,
+                    color=MARKER_COLORS[index % len(MARKER_COLORS)],
+                    line=dict(
+                        width=1,
+                        color='rgb(0, 0, 0)')),
+                name="{}: día {:g}".format(planet.name, time))
+
+
+def animation_layout(title, rng):
+    axis3d = dict(
+        showbackground=True,
+        backgroundcolor="rgb(230, 230, 230)",
+        gridcolor="rgb(255, 255, 255)",
+        zerolinecolor="rgb(255, 255, 255)",
+    )
+
+    return dict(
+        width=600, height=500,
+        scene=dict(xaxis=(axis3d),
+                   yaxis=(axis3d),
+                   zaxis=dict(axis3d,
+                              **dict(range=[-rng, rng],
+                                     autorange=False)),
+                   aspectratio=dict(x=1, y=1, z=1)),
+        title=title,
+        hovermode='closest',
+        updatemenus=[
+            {
+                'type': 'buttons',
+                'buttons': [
+                    {
+                        'label': 'Iniciar',
+                        'method': 'animate',
+                        'args': [None, dict(
+                            frame=dict(duration=0),
+                            transition=dict(duration=100),
+                            fromcurrent=True,
+                        )],
+                    }
+                ]
+            }
+        ]
+    )
+
+
+def animation_frame(planets, positions, time, marker_indices):
+    return dict(data=[marker_trace(planet, position, time, k)
+                      for k, (planet, position)
+                      in enumerate(zip(planets, positions))],
+                traces=marker_indices,
+                name='{:g}'.format(time))
+
+
+def to_json(obj):
+    return json.dumps(obj, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+def write_frames(f, frames):
+    f.write('[')
+    for k, frame in enumerate(frames):
+        if k:
+            f.write(',\n')
+        f.write(json.dumps(frame))
+    f.write(']')
+
+
+def write_figure_json(f, data, layout, frames):
+    f.write('{{"data": {}, "layout": {}, "frames": '.format(
+        to_json(data), to_json(layout)))
+    write_frames(f, frames)
+    f.write('}\n')
+
+
+HTML_HEADER = ('<html>\n<head><meta charset="utf-8" />\n'
+               '<script src="https://cdn.plot.ly/plotly-latest.min.js">'
+               '</script>\n</head>\n<body>\n'
+               '<div id="plot"></div>\n<script>\n')
+
+HTML_FOOTER = (';\nPlotly.newPlot("plot", data, layout).then(function() {\n'
+               '    Plotly.addFrames("plot", frames);\n});\n'
+               '</script>\n</body>\n</html>\n')
+
+BINARY_DECODER = """
+function decodeArray(array) {
+    var raw = atob(array.bdata);
+    var bytes = new Uint8Array(raw.length);
+    for (var i = 0; i < raw.length; i++) {
+        bytes[i] = raw.charCodeAt(i);
+    }
+    if (array.dtype === 'i4') {
+        return new Int32Array(bytes.buffer);
+    }
+    if (array.dtype === 'f8') {
+        return new Float64Array(bytes.buffer);
+    }
+    return new Float32Array(bytes.buffer);
+}
+
+function decodeTrace(trace) {
+    ['x', 'y', 'z'].forEach(function(key) {
+        if (trace[key] && trace[key].bdata !== undefined) {
+            trace[key] = decodeArray(trace[key]);
+        }
+    });
+    return trace;
+}
+
+function decodeFrames(markers) {
+    var times = decodeArray(markers.times);
+    var values = decodeArray(markers.positions);
+    var nplanets = markers.names.length;
+    var positions = new Float64Array(values.length);
+    var scale = markers.positions.scale || 1;
+    for (var i = 0; i < values.length; i++) {
+        positions[i] = values[i];
+        if (markers.positions.delta && i >= 3*nplanets) {
+            positions[i] += positions[i - 3*nplanets];
+        }
+    }
+    var frames = [];
+    for (var t = 0; t < times.length; t++) {
+        var data = [];
+        for (var p = 0; p < nplanets; p++) {
+            var k = 3*(t*nplanets + p);
+            data.push({x: [positions[k]*scale],
+                       y: [positions[k + 1]*scale],
+                       z: [positions[k + 2]*scale],
+                       name: markers.names[p] + ': día ' + times[t]});
+        }
+        frames.push({data: data, traces: markers.traces,
+                     name: String(times[t])});
+    }
+    return frames;
+}
+"""
+
+
+def write_figure_html(f, data, layout, frames):
+    f.write(HTML_HEADER)
+    f.write('var data = {};\n'.format(to_json(data)))
+    f.write('var layout = {};\n'.format(to_json(layout)))
+    f.write('var frames = ')
+    write_frames(f, frames)
+    f.write(HTML_FOOTER)
+
+
+def encode_array(values, decimals=None, dtype='<f4'):
+    values = np.asarray(values, dtype=float)
+    if decimals is not None:
+        values = np.round(values, decimals)
+    bdata = base64.b64encode(np.ascontiguousarray(values, dtype=dtype)
+                             .tobytes()).decode('ascii')
+    return dict(dtype=np.dtype(dtype).kind + str(np.dtype(dtype).itemsize),
+                bdata=bdata)
+
+
+def encode_trace(trace, decimals=None):
+    trace = dict(trace)
+    for key in 'xyz':
+        if key in trace:
+            trace[key] = encode_array(trace[key], decimals)
+    return trace
+
+
+def write_binary_positions(f, chunks, decimals=None, delta=False):
+    previous = None
+    scale = 10.0**-(6 if decimals is None else decimals)
+    for positions in chunks:
+        values = np.asarray(positions).transpose(1, 0, 2)
+        if delta:
+            quantized = np.round(values/scale)
+            if previous is None:
+                previous = np.zeros_like(quantized[:1])
+            deltas = np.diff(np.concatenate([previous, quantized]), axis=0)
+            previous = quantized[-1:]
+            if not np.abs(deltas).max() < 2**31:
+                raise ValueError(
+                    "Las posiciones no caben en int32 con {} decimales; "
+                    "use menos decimales o delta=False".format(
+                        6 if decimals is None else decimals))
+            f.write(encode_array(deltas, dtype='<i4')['bdata'])
+        else:
+            f.write(encode_array(values, decimals)['bdata'])
+
+
+def write_binary_figure(f, data, layout, markers, chunks, decimals=None,
+                        delta=False, as_json=False):
+    positions = dict(dtype='i4' if delta else 'f4', delta=delta)
+    if delta:
+        positions['scale'] = 10.0**-(6 if decimals is None else decimals)
+    head = dict(markers, positions=positions)
+    head = to_json(head)[:-2] + ', "bdata": "'
+
+    if as_json:
+        f.write('{{"data": {}, "layout": {}, "markers": {}'.format(
+            to_json(data), to_json(layout), head))
+        write_binary_positions(f, chunks, decimals, delta)
+        f.write('"}}}\n')
+        return
+
+    f.write(HTML_HEADER)
+    f.write(BINARY_DECODER)
+    f.write('var data = {}.map(decodeTrace);\n'.format(to_json(data)))
+    f.write('var layout = {};\n'.format(to_json(layout)))
+    f.write('var markers = {}'.format(head))
+    write_binary_positions(f, chunks, decimals, delta)
+    f.write('"}};\nvar frames = decodeFrames(markers)')
+    f.write(HTML_FOOTER)
+
+
+def build_animation(planets, times, orbits, positions, title, rng):
+    planets = list(planets)
+    data = [sun_trace()]
+    data += [orbit_trace(planet, orbit, k)
+             for k, (planet, orbit) in enumerate(zip(planets, orbits))]
+    marker_indices = list(range(len(data), len(data) + len(planets)))
+    data += animation_frame(planets, positions[:, 0], times[0],
+                            marker_indices)['data']
+
+    frames = [animation_frame(planets, positions[:, j], time, marker_indices)
+              for j, time in enumerate(times)]
+
+    return dict(data=data, layout=animation_layout(title, rng), frames=frames)
 
-        axis3d = dict(
-            showbackground=True,
-            backgroundcolor="rgb(230, 230, 230)",
-            gridcolor="rgb(255, 255, 255)",
-            zerolinecolor="rgb(255, 255, 255)",
-        )
 
-        layout = dict(
-            width=600, height=500,
-            scene=dict(xaxis=(axis3d),
-                       yaxis=(axis3d),
-                       zaxis=dict(axis3d,
-                                  **dict(range=[-rng, rng],
-                                         autorange=False)),
-                       aspectratio=dict(x=1, y=1, z=1)),
-            title='Movimiento orbital de los planetas exteriores',
-            hovermode='closest',
-            updatemenus=[
-                {
-                    'type': 'buttons',
-                    'buttons': [
-                        {
-                            'label': 'Iniciar',
-                            'method': 'animate',
-                            'args': [None, dict(
-                                frame=dict(duration=0),
-                                transition=dict(duration=100),
-                                fromcurrent=True,
-                            )],
-                        }
-                    ]
-                }
-            ]
-        )
-        
-        data = [
-            dict(x=[0], y=[0], z=[0],
-                 type='scatter3d',
-                 mode='markers',
-                 marker=dict(
-                     size=10,
-                     color='rgba(230, 230, 0, .9)',
-                     line=dict(width=1, color='rgb(100,100,0)')
-                 ),
-                 name='Sol'),
-            dict(x=orbits[0][:, 0],
-                 y=orbits[0][:, 1],
-                 z=orbits[0][:, 2],
-                 type='scatter3d',
-                 mode='lines',
-                 line=dict(width=2, color='blue'),
-                 name="Órbita de Júpiter"),
-            dict(x=orbits[1][:, 0],
-                 y=orbits[1][:, 1],
-                 z=orbits[1][:, 2],
-                 type='scatter3d',
-                 mode='lines',
-                 line=dict(width=2, color='orange'),
-                 name="Órbita de Saturno"),
-            dict(x=orbits[2][:, 0],
-                 y=orbits[2][:, 1],
-                 z=orbits[2][:, 2],
-                 type='scatter3d',
-                 mode='lines',
-                 line=dict(width=2, color='green'),
-                 name="Órbita de Urano"),
-            dict(x=orbits[3][:, 0],
-                 y=orbits[3][:, 1],
-                 z=orbits[3][:, 2],
-                 type='scatter3d',
-                 mode='lines',
-                 line=dict(width=2, color='red'),
-                 name="Órbita de Neptuno"),
-            dict(x=[planets[0][0][0]],
-                 y=[planets[0][0][1]],
-                 z=[planets[0][0][2]],
-                 type='scatter3d',
-                 mode='markers',
-                 marker=dict(
-                     size=5,
-                     color='rgba(0, 0, 150, .8)',
-                     line=dict(
-                         width=1,
-                         color='rgb(0, 0, 0)')),
-                 name="Júpiter: día 0"),
-            dict(x=[planets[1][0][0]],
-                 y=[planets[1][0][1]],
-                 z=[planets[1][0][2]],
-                 type='scatter3d',
-                 mode='markers',
-                 marker=dict(
-                     size=5,
-                     color='rgba(255, 140, 0, .8)',
-                     line=dict(
-                         width=1,
-                         color='rgb(0, 0, 0)')),
-                 name="Saturno: día 0"),
-            dict(x=[planets[2][0][0]],
-                 y=[planets[2][0][1]],
-                 z=[planets[2][0][2]],
-                 type='scatter3d',
-                 mode='markers',
-                 marker=dict(
-                     size=5,
-                     color='rgba(0, 250, 0, .8)',
-                     line=dict(
-                         width=1,
-                         color='rgb(0, 0, 0)')),
-                 name="Urano: día 0"),
-            dict(x=[planets[3][0][0]],
-                 y=[planets[3][0][1]],
-                 z=[planets[3][0][2]],
-                 type='scatter3d',
-                 mode='markers',
-                 marker=dict(
-                     size=5,
-                     color='rgba(250, 0, 0, .8)',
-                     line=dict(
-                         width=1,
-                         color='rgb(0, 0, 0)')),
-                 name="Neptuno: día 0")
-        ]
+class Displayer:
 
-        frames = [
-            dict(data=[
-                dict(x=[0], y=[0], z=[0],
-                     type='scatter3d',
-                     mode='markers',
-                     marker=dict(
-                         size=10,
-                         color='rgba(230, 230, 0, .9)',
-                         line=dict(width=1, color='rgb(100,100,0)')
-                     ),
-                     name='Sol'),
-                dict(x=orbits[0][:, 0],
-                     y=orbits[0][:, 1],
-                     z=orbits[0][:, 2],
-                     type='scatter3d',
-                     mode='lines',
-                     line=dict(width=2, color='blue'),
-                     name="Órbita de Júpiter"),
-                dict(x=orbits[1][:, 0],
-                     y=orbits[1][:, 1],
-                     z=orbits[1][:, 2],
-                     type='scatter3d',
-                     mode='lines',
-                     line=dict(width=2, color='orange'),
-                     name="Órbita de Saturno"),
-                dict(x=orbits[2][:, 0],
-                     y=orbits[2][:, 1],
-                     z=orbits[2][:, 2],
-                     type='scatter3d',
-                     mode='lines',
-                     line=dict(width=2, color='green'),
-                     name="Órbita de Urano"),
-                dict(x=orbits[3][:, 0],
-                     y=orbits[3][:, 1],
-                     z=orbits[3][:, 2],
-                     type='scatter3d',
-                     mode='lines',
-                     line=dict(width=2, color='red'),
-                     name="Órbita de Neptuno"),
-                dict(x=[planets[0][i][0]],
-                     y=[planets[0][i][1]],
-                     z=[planets[0][i][2]],
-                     type='scatter3d',
-                     mode='markers',
-                     marker=dict(
-                         size=5,
-                         color='rgba(0, 0, 150, .8)',
-                         line=dict(
-                             width=1,
-                             color='rgb(0, 0, 0)')),
-                     name="Júpiter: día {}".format(steps*i)),
-                dict(x=[planets[1][i][0]],
-                     y=[planets[1][i][1]],
-                     z=[planets[1][i][2]],
-                     type='scatter3d',
-                     mode='markers',
-                     marker=dict(
-                         size=5,
-                         color='rgba(255, 140, 0, .8)',
-                         line=dict(
-                             width=1,
-                             color='rgb(0, 0, 0)')),
-                     name="Saturno: día {}".format(steps*i)),
-                dict(x=[planets[2][i][0]],
-                     y=[planets[2][i][1]],
-                     z=[planets[2][i][2]],
-                     type='scatter3d',
-                     mode='markers',
-                     marker=dict(
-                         size=5,
-                         color='rgba(0, 250, 0, .8)',
-                         line=dict(
-                             width=1,
-                             color='rgb(0, 0, 0)')),
-                     name="Urano: día {}".format(steps*i)),
-                dict(x=[planets[3][i][0]],
-                     y=[planets[3][i][1]],
-                     z=[planets[3][i][2]],
-                     type='scatter3d',
-                     mode='markers',
-                     marker=dict(
-                         size=5,
-                         color='rgba(250, 0, 0, .8)',
-                         line=dict(
-                             width=1,
-                             color='rgb(0, 0, 0)')),
-                     name="Neptuno: día {}".format(steps*i)),
-                ]) for i in range(len(planets[0]))]
-        
-        fig = dict(data=data, layout=layout, frames=frames)
-        py.iplot(fig, filename='plots/outer_planets_plot')
+    def eccentric_comparison(self, planet, time, state=None):
+        state = planet.state(time) if state is None else state
+        bessel = state.eccentric_annomaly_bessel(20)
+        newton = state.eccentric_annomaly
+        lines = []
 
+        lines.append("Anomalía excéntrica de {} el día {},"
+                     .format(planet.name, time) +
+                     "calculada usando funciones de Bessel: {}"
+                     .format(bessel))
 
-class Displayer:
+        lines.append("Anomalía excéntrica de {} el día {},"
+                     .format(planet.name, time) +
+                     "calculada por el método de Newton: {}"
+                     .format(newton))
 
-    def compare_eccentric_anomalies(self, planet, time):
-        print("Anomalía excéntrica de {} el día {},"
-              .format(planet.name, time) +
-              "calculada usando funciones de Bessel: {}"
-              .format(planet.eccentric_annomaly_bessel(time, 20)))
+        lines.append("Diferencia entre ambos valores: {}"
+                     .format(abs(bessel - newton)))
+        return lines
 
-        print("Anomalía excéntrica de {} el día {},"
-              .format(planet.name, time) +
-              "calculada por el método de Newton: {}"
-              .format(planet.eccentric_annomaly(time)))
+    def compare_eccentric_anomalies(self, planet, time, state=None):
+        print("\n".join(self.eccentric_comparison(planet, time, state)))
 
-        print("Diferencia entre ambos valores: {}"
-              .format(abs(planet.eccentric_annomaly_bessel(time, 20) -
-                          planet.eccentric_annomaly(time))))
+    def information(self, planet, time, state=None, method=None):
+        state = planet.state(time) if state is None else state
+        lines = []
 
-    def print_information(self, planet, time):
+        lines.append("Posición de {} en el día {}: {}"
+                     .format(planet.name, time, state.position))
 
-        print("Posición de {} en el día {}: {}"
-              .format(planet.name, time, planet.position(time)))
+        lines.append("Distancia al sol de {} en el día {}: {}\n"
+                     .format(planet.name, time, state.distance_to_sun))
 
-        print("Distancia al sol de {} en el día {}: {}\n"
-              .format(planet.name, time, planet.distance_to_sun(time)))
+        lines.append("Velocidad de {} en el día {}: {}"
+                     .format(planet.name, time, state.speed))
 
-        print("Velocidad de {} en el día {}: {}"
-              .format(planet.name, time, planet.speed(time)))
+        lines.append("Módulo de la velocidad de {} en el día {}: {}\n"
+                     .format(planet.name, time, state.speed_module))
 
-        print("Módulo de la velocidad de {} en el día {}: {}\n"
-              .format(planet.name, time, planet.speed_module(time)))
+        if method is not None:
+            lines.append("Anomalía real de {} en el día {}: {}"
+                         .format(planet.name, time,
+                                 planet.real_annomaly(time, method)))
 
-        print("Anomalía real de {} en el día {}: {}"
-              .format(planet.name, time, planet.real_annomaly(time)))
+        lines.append("Anomalía real de {} en el día {}"
+                     .format(planet.name, time) +
+                     " (cálculo a partir de la anomalía excéntrica): {}\n"
+                     .format(state.real_annomaly))
 
-        print("Anomalía real de {} en el día {}"
-              .format(planet.name, time) +
-              " (cálculo a partir de la anomalía excéntrica): {}\n"
-              .format(planet.real_annomaly_from_eccentric(time)))
+        lines.append("Energía de {} en el día {}: {}"
+                     .format(planet.name, time, state.energy))
 
-        print("Energía de {} en el día {}: {}"
-              .format(planet.name, time, planet.energy_from_time(time)))
+        lines.append("Energía (constante) de {}: {}\n"
+                     .format(planet.name, planet.energy()))
 
-        print("Energía (constante) de {}: {}\n"
-              .format(planet.name, planet.energy()))
+        lines.append("Momento angular de {} en el día {}: {}"
+                     .format(planet.name, time, state.angular_moment))
+        lines.append("Módulo del momento angular de {} en el día {}: {}"
+                     .format(planet.name, time, state.angular_moment_module))
+        lines.append("Módulo del momento angular de {} (constante): {}\n"
+                     .format(planet.name, planet.c))
 
-        print("Momento angular de {} en el día {}: {}"
-              .format(planet.name, time,
-                      planet.angular_moment_from_time(time)))
-        print("Módulo del momento angular de {} en el día {}: {}"
-              .format(planet.name, time,
-                      np.linalg.norm(planet.angular_moment_from_time(time))))
-        print("Módulo del momento angular de {} (constante): {}\n"
-              .format(planet.name, planet.c))
+        lines += self.eccentric_comparison(planet, time, state)
+        return "\n".join(lines)
 
-        self.compare_eccentric_anomalies(planet, time)
+    def print_information(self, planet, time, state=None, method=None):
+        print(self.information(planet, time, state, method))
 
-    def display_orbit(self, planet, time):
+    def orbit_figure(self, planet, time, pixel_error=0.5):
 
-        xs = planet.get_orbit(200)
+        rng = int(1.2*planet.a) + 1
+        if pixel_error is None:
+            xs = planet.get_orbit(200)
+        else:
+            xs = planet.get_adaptive_orbit(
+                pixel_tolerance(pixel_error, rng, 600))
 
         orbit = go.Scattergl(x=xs[:, 0], y=xs[:, 1],
                              name='órbita')
@@ -563,8 +533,6 @@ class Displayer:
                            ),
                            name='Sol')
 
-        rng = int(1.2*planet.a) + 1
-
         layout = go.Layout(
             width=600, height=500,
             xaxis=dict(
@@ -578,8 +546,11 @@ class Displayer:
             )
         )
         data = [orbit, planet_pos, sun]
-        fig = go.Figure(data=data, layout=layout)
-        py.iplot(fig, filename='plots/orbit_plot')
+        return go.Figure(data=data, layout=layout)
+
+    def display_orbit(self, planet, time, pixel_error=0.5):
+        py.iplot(self.orbit_figure(planet, time, pixel_error),
+                 filename='plots/orbit_plot')
 
     def print_2bodies_solution(self, planet, time):
         static_pos = planet.position_2d(time)
@@ -591,9 +562,15 @@ class Displayer:
 
         print("Posición del Sol en el día {}: {}".format(time, pos[1]))
 
-    def print_2bodies_orbit(self, planet, time):
-        xs = planet.get_orbit_2d(200)
-        xs_2bodies = planet.get_orbit_2bodies(200)
+    def print_2bodies_orbit(self, planet, time, pixel_error=0.5):
+        rng = int(1.2*planet.a) + 1
+        if pixel_error is None:
+            xs = planet.get_orbit_2d(200)
+            xs_2bodies = planet.get_orbit_2bodies(200)
+        else:
+            tol = pixel_tolerance(pixel_error, rng, 700)
+            xs = planet.get_adaptive_orbit(tol, '2d')
+            xs_2bodies = planet.get_adaptive_orbit(tol, '2bodies')
 
         orbit = go.Scattergl(x=xs[:, 0], y=xs[:, 1], name='órbita')
 
@@ -624,8 +601,6 @@ class Displayer:
                            ),
                            name='Sol')
 
-        rng = int(1.2*planet.a) + 1
-
         layout = go.Layout(
             width=700, height=500,
             xaxis=dict(
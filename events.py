@@ -0,0 +1,106 @@
+from collections import namedtuple
+import numpy as np
+
+Event = namedtuple('Event', ['time', 'kind', 'planet', 'other'])
+
+
+def refine(func, a, b, fa, fb, xtol=1e-8, max_iter=100):
+    a, b, fa, fb = [np.array(x, dtype=float) for x in (a, b, fa, fb)]
+    side = np.zeros(a.shape, dtype=int)
+
+    for _ in range(max_iter):
+        active = np.flatnonzero(np.abs(b - a) > xtol)
+        if not len(active):
+            break
+        a_, b_, fa_, fb_ = a[active], b[active], fa[active], fb[active]
+        c = (a_*fb_ - b_*fa_)/(fb_ - fa_)
+        fc = func(c)
+
+        # Illinois variant of regula falsi: halve the value kept at an
+        # endpoint that has not moved for two steps
+        move_a = np.sign(fc) == np.sign(fa_)
+        last = side[active]
+        fa[active] = np.where(move_a, fc, np.where(last == -1, fa_/2, fa_))
+        fb[active] = np.where(move_a, np.where(last == 1, fb_/2, fb_), fc)
+        a[active] = np.where(move_a, c, a_)
+        b[active] = np.where(move_a, b_, c)
+        side[active] = np.where(move_a, 1, -1)
+
+        zero = active[fc == 0]
+        a[zero] = b[zero] = c[fc == 0]
+
+    return (a + b)/2
+
+
+def find_roots(func, t_start, t_end, step, xtol=1e-8):
+    times = np.arange(t_start, t_end + step, step)
+    times[-1] = min(times[-1], t_end)
+    values = func(times)
+
+    signs = np.sign(values)
+    brackets = np.flatnonzero(signs[:-1]*signs[1:] < 0)
+    roots = refine(func, times[brackets], times[brackets + 1],
+                   values[brackets], values[brackets + 1], xtol)
+    rising = signs[brackets + 1] > 0
+
+    exact = np.flatnonzero(signs[:-1] == 0)
+    after = np.sign(values[np.minimum(exact + 1, len(values) - 1)])
+    roots = np.concatenate([roots, times[exact]])
+    rising = np.concatenate([rising, after > 0])
+
+    order = np.argsort(roots)
+    return roots[order], rising[order]
+
+
+def radial_speed(planet):
+    return lambda times: np.sum(planet.positions(times)*planet.speeds(times),
+                                axis=-1)
+
+
+def longitude_difference(planet, observer):
+    def func(times):
+        relative = planet.positions(times) - observer.positions(times)
+        sun = -observer.positions(times)
+        return np.sin(np.arctan2(relative[..., 1], relative[..., 0]) -
+                      np.arctan2(sun[..., 1], sun[..., 0]))
+    return func
+
+
+def separation_speed(planet, other):
+    def func(times):
+        relative = planet.positions(times) - other.positions(times)
+        speed = planet.speeds(times) - other.speeds(times)
+        return np.sum(relative*speed, axis=-1)
+    return func
+
+
+def synodic_step(planet, other, fraction=16):
+    synodic = 1/abs(1/planet.period - 1/other.period)
+    return min(planet.period, other.period, synodic)/fraction
+
+
+def apsides(planet, t_start, t_end, step=None):
+    step = planet.period/16 if step is None else step
+    roots, rising = find_roots(radial_speed(planet), t_start, t_end, step)
+    return [Event(time, 'perihelion' if up else 'aphelion', planet.name, None)
+            for time, up in zip(roots, rising)]
+
+
+def conjunctions(planet, observer, t_start, t_end, step=None):
+    step = synodic_step(planet, observer) if step is None else step
+    roots, _ = find_roots(longitude_difference(planet, observer),
+                          t_start, t_end, step)
+    sun = -observer.positions(roots)
+    relative = planet.positions(roots) + sun
+    same_side = np.sum(relative[:, :2]*sun[:, :2], axis=-1) > 0
+    return [Event(time, 'conjunction' if conjunction else 'opposition',
+                  planet.name, observer.name)
+            for time, conjunction in zip(roots, same_side)]
+
+
+def closest_approaches(planet, other, t_start, t_end, step=None):
+    step = synodic_step(planet, other) if step is None else step
+    roots, rising = find_roots(separation_speed(planet, other),
+                               t_start, t_end, step)
+    return [Event(time, 'closest_approach', planet.name, other.name)
+            for time, up in zip(roots, rising) if up]
@@ -0,0 +1,146 @@
+import numpy as np
+
+
+def rk4(func, t_0, x_0, t_final, steps, full_output=False):
+    h = (t_final - t_0)/steps
+    curr_x = np.array(x_0, dtype=float)
+
+    if full_output:
+        ts = t_0 + h*np.arange(steps + 1)
+        xs = np.empty((steps + 1,) + curr_x.shape)
+        xs[0] = curr_x
+
+    for i in range(steps):
+        t = t_0 + i*h
+        k_1 = np.asarray(func(t, curr_x))
+        k_2 = np.asarray(func(t + h/2, curr_x + k_1*(h/2)))
+        k_3 = np.asarray(func(t + h/2, curr_x + k_2*(h/2)))
+        k_4 = np.asarray(func(t + h, curr_x + k_3*h))
+        curr_x = curr_x + (k_1 + 2*(k_2 + k_3) + k_4)*(h/6)
+        if full_output:
+            xs[i + 1] = curr_x
+
+    if full_output:
+        return ts, xs
+    return curr_x
+
+
+C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1, 1])
+
+A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84],
+]
+
+E = np.array([71/57600, 0, -71/16695, 71/1920, -17253/339200,
+              22/525, -1/40])
+
+D = np.array([-12715105075/11282082432, 0, 87487479700/32700410799,
+              -10690763975/1880347072, 701980252875/199316789632,
+              -1453857185/822651844, 69997945/29380423])
+
+
+class DenseSolution:
+
+    def __init__(self, ts, xs, coefs):
+        self.ts = np.asarray(ts)
+        self.xs = np.asarray(xs)
+        self.coefs = np.asarray(coefs)
+        self.t_min = min(self.ts[0], self.ts[-1])
+        self.t_max = max(self.ts[0], self.ts[-1])
+        self.nfev = 0
+
+    def __call__(self, times):
+        times = np.asarray(times, dtype=float)
+        slack = 1e-12*max(1, abs(self.t_min), abs(self.t_max))
+        if np.any((times < self.t_min - slack) | (times > self.t_max + slack)):
+            raise ValueError("Tiempos fuera del intervalo integrado "
+                             "[{}, {}]".format(self.t_min, self.t_max))
+        if len(self.ts) == 1:
+            return np.broadcast_to(self.xs[0], times.shape + self.xs[0].shape)
+        direction = 1 if self.ts[-1] >= self.ts[0] else -1
+        idx = np.searchsorted(direction*self.ts, direction*times,
+                              side='right') - 1
+        idx = np.clip(idx, 0, len(self.ts) - 2)
+
+        h = self.ts[idx + 1] - self.ts[idx]
+        theta = (times - self.ts[idx])/h
+        theta1 = 1 - theta
+        extra = (Ellipsis,) + (None,)*(self.xs.ndim - 1)
+        theta = theta[extra]
+        theta1 = theta1[extra]
+
+        r1, r2, r3, r4, r5 = [self.coefs[idx, j] for j in range(5)]
+        return r1 + theta*(r2 + theta1*(r3 + theta*(r4 + theta1*r5)))
+
+
+def error_norm(err, x, x_new, rtol, atol):
+    scale = atol + rtol*np.maximum(np.abs(x), np.abs(x_new))
+    return np.sqrt(np.mean((err/scale)**2))
+
+
+def dormand_prince(func, t_0, x_0, t_final, rtol=1e-9, atol=1e-12,
+                   h=None, max_steps=100000):
+    curr_x = np.array(x_0, dtype=float)
+    direction = 1 if t_final >= t_0 else -1
+    span = abs(t_final - t_0)
+    k = np.empty((7,) + curr_x.shape)
+    k[0] = func(t_0, curr_x)
+    nfev = 1
+
+    if h is None:
+        scale = atol + rtol*np.abs(curr_x)
+        d_0 = np.sqrt(np.mean((curr_x/scale)**2))
+        d_1 = np.sqrt(np.mean((k[0]/scale)**2))
+        h = 0.01*d_0/d_1 if d_0 > 1e-5 and d_1 > 1e-5 else 1e-6
+    h = min(abs(h), span) if span > 0 else 0
+
+    t = t_0
+    ts = [t]
+    xs = [curr_x]
+    coefs = []
+
+    for _ in range(max_steps):
+        if direction*(t_final - t) <= 0:
+            break
+        h = min(h, abs(t_final - t))
+        step = direction*h
+
+        for j in range(1, 7):
+            x_stage = curr_x + step*np.tensordot(A[j], k[:j], axes=1)
+            k[j] = func(t + C[j]*step, x_stage)
+        nfev += 6
+
+        next_x = x_stage
+        err = step*np.tensordot(E, k, axes=1)
+        err = error_norm(err, curr_x, next_x, rtol, atol)
+
+        if err <= 1:
+            diff = next_x - curr_x
+            bspl = step*k[0] - diff
+            coefs.append([curr_x,
+                          diff,
+                          bspl,
+                          diff - step*k[6] - bspl,
+                          step*np.tensordot(D, k, axes=1)])
+            t = t + step
+            curr_x = next_x
+            ts.append(t)
+            xs.append(curr_x)
+            k[0] = k[6]
+
+        factor = 10 if err == 0 else 0.9*err**(-1/5)
+        h = h*min(10, max(0.2, factor))
+
+    if direction*(t_final - t) > 0:
+        raise RuntimeError("Se alcanzó max_steps={} en t={} antes de llegar "
+                           "a t_final={}".format(max_steps, t, t_final))
+
+    solution = DenseSolution(ts, xs, coefs)
+    solution.nfev = nfev
+    return solution
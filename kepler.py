@@ -0,0 +1,165 @@
+import functools
+import numpy as np
+import scipy.special as sp
+
+
+def reduce_annomaly(ji):
+    return ji - 2*np.pi*np.floor((ji + np.pi)/(2*np.pi))
+
+
+def series_starter(ji, epsilon):
+    return (ji + epsilon*np.sin(ji) + epsilon**2*np.sin(2*ji)/2 +
+            epsilon**3*(3*np.sin(3*ji) - np.sin(ji))/8)
+
+
+def cubic_starter(ji, epsilon):
+    # Mikkola's cubic approximation, valid for ji in [-pi, pi]
+    alpha = (1 - epsilon)/(4*epsilon + 0.5)
+    beta = ji/(2*(4*epsilon + 0.5))
+    sign = np.where(beta < 0, -1.0, 1.0)
+    z = np.cbrt(beta + sign*np.sqrt(beta**2 + alpha**3))
+    s = z - alpha/z
+    s = s - 0.078*s**5/(1 + epsilon)
+    return ji + epsilon*(3*s - 4*s**3)
+
+
+def newton_step(u, ji, epsilon):
+    f = u - epsilon*np.sin(u) - ji
+    return -f/(1 - epsilon*np.cos(u))
+
+
+def halley_step(u, ji, epsilon):
+    f = u - epsilon*np.sin(u) - ji
+    f1 = 1 - epsilon*np.cos(u)
+    f2 = epsilon*np.sin(u)
+    return -f/(f1 - f*f2/(2*f1))
+
+
+def danby_step(u, ji, epsilon):
+    f = u - epsilon*np.sin(u) - ji
+    f1 = 1 - epsilon*np.cos(u)
+    f2 = epsilon*np.sin(u)
+    f3 = 1 - f1
+    d1 = -f/f1
+    d2 = -f/(f1 + d1*f2/2)
+    return -f/(f1 + d2*f2/2 + d2**2*f3/6)
+
+
+def solve(ji, epsilon, tol=1e-14, starter=cubic_starter, step=danby_step,
+          max_iter=10, full_output=False):
+    ji = np.asarray(ji, dtype=float)
+    epsilon = np.asarray(epsilon, dtype=float)
+    shape = np.broadcast(ji, epsilon).shape
+    ji = np.broadcast_to(ji, shape).ravel()
+    epsilon = np.broadcast_to(epsilon, shape).ravel()
+
+    reduced = reduce_annomaly(ji)
+    next_u, iterations = iterate(starter(reduced, epsilon), reduced, epsilon,
+                                 tol, step, max_iter)
+
+    next_u = (next_u + ji - reduced).reshape(shape)
+    iterations = iterations.reshape(shape)
+
+    if full_output:
+        return next_u, iterations
+    return next_u
+
+
+def iterate(u, ji, epsilon, tol=1e-14, step=danby_step, max_iter=10):
+    next_u = np.array(u, dtype=float)
+    iterations = np.zeros(ji.shape, dtype=int)
+    active = np.ones(ji.shape, dtype=bool)
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        delta = step(next_u[active], ji[active], epsilon[active])
+        next_u[active] += delta
+        iterations[active] += 1
+        active[active] = np.abs(delta) > tol
+
+    return next_u, iterations
+
+
+def taylor_seed(u, jump, epsilon):
+    sin_u = epsilon*np.sin(u)
+    cos_u = epsilon*np.cos(u)
+    f1 = 1 - cos_u
+    d1 = 1/f1
+    d2 = -sin_u*d1**3
+    d3 = (3*sin_u**2*d1 - cos_u)*d1**4
+    return u + jump*(d1 + jump*(d2/2 + jump*d3/6))
+
+
+def continuation(jis, epsilon, tol=1e-14, max_iter=10, max_jump=0.5):
+    # Danby's step converges quartically, so a correction below tol**(1/3)
+    # leaves an error well under tol; the cold solves use the same rule
+    stop = tol**(1/3)
+    u = prev = None
+    for ji in jis:
+        ji = np.asarray(ji, dtype=float)
+        shape = np.broadcast(ji, epsilon).shape
+        ji = np.broadcast_to(ji, shape).ravel()
+        eps = np.broadcast_to(np.asarray(epsilon, dtype=float), shape).ravel()
+
+        next_u = np.empty(ji.shape)
+        iterations = np.zeros(ji.shape, dtype=int)
+        cold = np.ones(ji.shape, dtype=bool)
+
+        if u is not None:
+            near = np.flatnonzero(np.abs(ji - prev) <= max_jump)
+            ji_near, eps_near = ji[near], eps[near]
+            seed = np.clip(taylor_seed(u[near], ji_near - prev[near],
+                                       eps_near),
+                           ji_near - eps_near, ji_near + eps_near)
+            warm, count = iterate(seed, ji_near, eps_near, stop, danby_step,
+                                  max_iter)
+            # error estimate of the result, with room for the rounding of
+            # sin() at large unreduced anomalies
+            error = (np.abs(warm - eps_near*np.sin(warm) - ji_near) /
+                     (1 - eps_near*np.cos(warm)))
+            cold[near] = ((count >= max_iter) |
+                          (error > tol*(1 + np.abs(ji_near))))
+            next_u[near], iterations[near] = warm, count
+
+        if cold.any():
+            next_u[cold], iterations[cold] = solve(
+                ji[cold], eps[cold], stop, max_iter=max_iter,
+                full_output=True)
+        u, prev = next_u, ji
+        yield u.reshape(shape), iterations.reshape(shape)
+
+
+def real_from_eccentric(u, epsilon):
+    reduced = reduce_annomaly(u)
+    theta = 2*np.arctan2(np.sqrt(1 + epsilon)*np.sin(reduced/2),
+                         np.sqrt(1 - epsilon)*np.cos(reduced/2))
+    return theta + u - reduced
+
+
+@functools.lru_cache(maxsize=256)
+def bessel_coefficients(epsilon, nfuncs):
+    n = np.arange(1, nfuncs + 1)
+    coefs = 2/n*sp.jv(n, n*epsilon)
+    coefs.setflags(write=False)
+    return coefs
+
+
+@functools.lru_cache(maxsize=256)
+def bessel_nfuncs(epsilon, tol=1e-12, max_nfuncs=10000):
+    if epsilon == 0:
+        return 1
+    root = np.sqrt(1 - epsilon**2)
+    q = epsilon*np.exp(root)/(1 + root)
+    n = np.arange(1, max_nfuncs + 1)
+    tail = 2*q**(n + 1)/((n + 1)*(1 - q))
+    return int(n[np.argmax(tail <= tol)]) if (tail <= tol).any() else max_nfuncs
+
+
+def eccentric_from_bessel(ji, epsilon, nfuncs=None, tol=1e-12):
+    if nfuncs is None:
+        nfuncs = bessel_nfuncs(float(epsilon), tol)
+    coefs = bessel_coefficients(float(epsilon), int(nfuncs))
+    ji = np.asarray(ji, dtype=float)
+    harmonics = np.sin(np.multiply.outer(ji, np.arange(1, nfuncs + 1)))
+    return ji + np.dot(harmonics, coefs)
@@ -0,0 +1,104 @@
+import numpy as np
+from planet import SUN_MASS
+
+K = 0.01720209895
+GM_SUN = K**2
+
+
+def accelerations(positions, gms):
+    diff = positions[np.newaxis, :, :] - positions[:, np.newaxis, :]
+    dist2 = np.einsum('ijk,ijk->ij', diff, diff)
+    np.fill_diagonal(dist2, np.inf)
+    factor = gms[np.newaxis, :]/(dist2*np.sqrt(dist2))
+    return np.einsum('ij,ijk->ik', factor, diff)
+
+
+def energy(positions, velocities, gms):
+    kinetic = 0.5*np.sum(gms*np.einsum('ij,ij->i', velocities, velocities))
+    diff = positions[np.newaxis, :, :] - positions[:, np.newaxis, :]
+    dist = np.sqrt(np.einsum('ijk,ijk->ij', diff, diff))
+    i, j = np.triu_indices(len(gms), 1)
+    potential = -np.sum(gms[i]*gms[j]/dist[i, j])
+    return kinetic + potential
+
+
+def leapfrog(positions, velocities, gms, h, steps):
+    acc = accelerations(positions, gms)
+    for _ in range(steps):
+        velocities = velocities + acc*(h/2)
+        positions = positions + velocities*h
+        acc = accelerations(positions, gms)
+        velocities = velocities + acc*(h/2)
+    return positions, velocities
+
+
+class NBodySystem:
+
+    def __init__(self, planets, t_0=0):
+        self.planets = list(planets)
+        self.names = [planet.name for planet in self.planets]
+        self.gms = GM_SUN*np.array(
+            [1] + [planet.mass/SUN_MASS for planet in self.planets])
+        self.t_0 = t_0
+
+        positions = np.zeros((len(self.gms), 3))
+        velocities = np.zeros((len(self.gms), 3))
+        for index, planet in enumerate(self.planets, 1):
+            positions[index] = planet.position(t_0)
+            velocities[index] = planet.speed(t_0)
+
+        total = np.sum(self.gms)
+        positions -= np.dot(self.gms, positions)/total
+        velocities -= np.dot(self.gms, velocities)/total
+        self.initial = positions, velocities
+        self.reset()
+
+    def reset(self):
+        self.time = self.t_0
+        self.pos, self.vel = self.initial
+
+    def energy(self):
+        return energy(self.pos, self.vel, self.gms)
+
+    def advance(self, time, h=1):
+        span = time - self.time
+        steps = int(np.ceil(abs(span)/h))
+        if steps:
+            self.pos, self.vel = leapfrog(
+                self.pos, self.vel, self.gms, span/steps, steps)
+        self.time = time
+
+    def propagate(self, times, h=1):
+        times = np.asarray(times, dtype=float)
+        flat = times.ravel()
+        positions = np.empty(flat.shape + self.pos.shape)
+        velocities = np.empty(flat.shape + self.vel.shape)
+        energies = np.empty(flat.shape)
+
+        order = np.argsort(flat)
+        split = np.searchsorted(flat[order], self.t_0)
+        for indices in (order[split:], order[:split][::-1]):
+            self.reset()
+            for index in indices:
+                self.advance(flat[index], h)
+                positions[index] = self.pos
+                velocities[index] = self.vel
+                energies[index] = self.energy()
+        self.reset()
+
+        return (positions.reshape(times.shape + self.pos.shape),
+                velocities.reshape(times.shape + self.vel.shape),
+                energies.reshape(times.shape))
+
+    def positions(self, times, h=1):
+        positions, _, _ = self.propagate(times, h)
+        return (positions[..., 1:, :] -
+                positions[..., :1, :]).swapaxes(0, -2)
+
+    def position(self, planet, time, h=1):
+        return self.positions(time, h)[self.names.index(str(planet))]
+
+    def energy_drift(self, times, h=1):
+        _, _, energies = self.propagate(times, h)
+        initial = energy(self.initial[0], self.initial[1], self.gms)
+        return (energies - initial)/abs(initial)
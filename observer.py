@@ -0,0 +1,38 @@
+from collections import namedtuple
+import numpy as np
+
+SPEED_OF_LIGHT = 173.1446
+
+Observation = namedtuple('Observation', ['vectors', 'ranges', 'light_time',
+                                         'longitude', 'latitude',
+                                         'elongation'])
+
+
+def observe(targets, observer, times, light_time=True, tol=1e-12,
+            max_iter=5):
+    times = np.atleast_1d(np.asarray(times, dtype=float))
+    origin = observer.positions(times)
+    sun = -origin
+
+    delay = np.zeros((len(targets),) + times.shape)
+    for _ in range(max_iter if light_time else 1):
+        vectors = targets.positions(times - delay) - origin
+        ranges = np.linalg.norm(vectors, axis=-1)
+        if not light_time:
+            break
+        new_delay = ranges/SPEED_OF_LIGHT
+        converged = np.abs(new_delay - delay).max() <= tol
+        delay = new_delay
+        if converged:
+            break
+
+    cos_elongation = (np.sum(vectors*sun, axis=-1) /
+                      (ranges*np.linalg.norm(sun, axis=-1)))
+    return Observation(
+        vectors=vectors,
+        ranges=ranges,
+        light_time=delay,
+        longitude=np.arctan2(vectors[..., 1], vectors[..., 0]) % (2*np.pi),
+        latitude=np.arcsin(vectors[..., 2]/ranges),
+        elongation=np.arccos(np.clip(cos_elongation, -1, 1)),
+    )
@@ -0,0 +1,67 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+import numpy as np
+
+
+def evaluate(planet, times, model):
+    if model == '2d':
+        return planet.positions_2d(times)
+    if model == '2bodies':
+        return planet.positions_2bodies(times)
+    if model == 'speeds':
+        return planet.speeds(times)
+    return planet.positions(times)
+
+
+def ephemeris_shard(name, shape, planet, index, start, times, model):
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        out = np.ndarray(shape, dtype=float, buffer=shm.buf)
+        out[index, start:start + len(times)] = evaluate(planet, times, model)
+        del out
+    finally:
+        shm.close()
+    return index, start
+
+
+def parallel_ephemeris(planets, times, model='3d', workers=None,
+                       chunk_size=None):
+    planets = list(planets)
+    times = np.asarray(times, dtype=float)
+    if times.ndim == 1:
+        times = np.broadcast_to(times, (len(planets), len(times)))
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        pieces = max(1, -(-workers//len(planets)))
+        chunk_size = max(1, -(-times.shape[1]//pieces))
+    dim = 2 if model in ('2d', '2bodies') else 3
+    shape = (len(planets), times.shape[1], dim)
+
+    shm = shared_memory.SharedMemory(
+        create=True, size=max(1, int(np.prod(shape))*8))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(ephemeris_shard, shm.name, shape, planet,
+                                   index, start,
+                                   times[index, start:start + chunk_size],
+                                   model)
+                       for index, planet in enumerate(planets)
+                       for start in range(0, times.shape[1], chunk_size)]
+            for future in futures:
+                future.result()
+        result = np.array(np.ndarray(shape, dtype=float, buffer=shm.buf))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return result
+
+
+def parallel_orbits(planets, npoints, model='2bodies', workers=None):
+    planets = list(planets)
+    periods = np.array([planet.period_2bodies if model == '2bodies'
+                        else planet.period for planet in planets])
+    times = np.linspace(0, 1, npoints, endpoint=False)*periods[:, None]
+    orbits = parallel_ephemeris(planets, times, model, workers)
+    return np.concatenate([orbits, orbits[:, :1]], axis=1)
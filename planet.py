@@ -1,42 +1,134 @@
+from collections import OrderedDict
+import hashlib
+import itertools
+import os
 import numpy as np
 import utils
-import scipy.special as sp
+import backend
+import kepler
+import trajectory
+
+
+G = 6.674*10**(-11)
+SUN_MASS = 1.989*10**30
+
+
+class OrbitCache:
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, compute):
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+        value = compute()
+        value.setflags(write=False)
+        self.entries[key] = value
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+orbit_cache = OrbitCache()
+versions = itertools.count()
+
+
+def orbital_element(name):
+    attr = '_' + name
+
+    def getter(self):
+        return getattr(self, attr)
+
+    def setter(self, value):
+        setattr(self, attr, value)
+        self.update_constants()
+
+    return property(getter, setter)
 
 
 class Planet:
+    __slots__ = ('name', 'version', '_epsilon', '_a', '_period', '_mass',
+                 '_i', '_omega', '_bar_omega',
+                 'trajectory', 'trajectory_2bodies',
+                 'sqrt_epsilon', 'mu', 'c', 'deriv_factor',
+                 'mu_2bodies', 'c_2bodies', 'period_2bodies',
+                 'deriv_factor_2bodies',
+                 'cos_i', 'sin_i', 'cos_omega', 'sin_omega',
+                 'cos_bar_omega', 'sin_bar_omega', 'rot_mat')
+
+    epsilon = orbital_element('epsilon')
+    a = orbital_element('a')
+    period = orbital_element('period')
+    mass = orbital_element('mass')
+    i = orbital_element('i')
+    omega = orbital_element('omega')
+    bar_omega = orbital_element('bar_omega')
+
     def __init__(self, name, epsilon, a, period, mass, i, omega, bar_omega):
         self.name = name
-        self.epsilon = epsilon
-        self.a = a
-        self.period = period
-        self.orbit = None
-        self.orbit_2d = None
-        self.orbit_2bodies = None
-        self.mass = mass
+        self._epsilon = epsilon
+        self._a = a
+        self._period = period
+        self._mass = mass
+        self._i = np.deg2rad(i)
+        self._omega = np.deg2rad(omega)
+        self._bar_omega = np.deg2rad(bar_omega)
+        self.update_constants()
+
+    def update_constants(self):
+        self.version = next(versions)
+        self.trajectory = None
+        self.trajectory_2bodies = None
+
+        self.sqrt_epsilon = np.sqrt(1-self.epsilon**2)
+        denom = self.a**2*(1 - self.epsilon**2)**2
 
         self.mu = 4*np.pi**2*self.a**3/self.period**2
-        self.c = np.sqrt(self.mu*self.a*(1-epsilon**2))
-        self.i = np.deg2rad(i)
-        self.omega = np.deg2rad(omega)
-        self.bar_omega = np.deg2rad(bar_omega)
-        ux = np.cos(self.omega)
-        uy = np.sin(self.omega)
+        self.c = np.sqrt(self.mu*self.a*(1-self.epsilon**2))
+        self.deriv_factor = self.c/denom
+
+        self.mu_2bodies = (8.9546188*10**(-25)*G*SUN_MASS**3 /
+                           (self.mass + SUN_MASS)**2)
+        self.c_2bodies = np.sqrt(self.mu_2bodies*self.a*(1-self.epsilon**2))
+        self.period_2bodies = np.sqrt(4*np.pi**2*self.a**3/self.mu_2bodies)
+        self.deriv_factor_2bodies = self.c_2bodies/denom
+
+        self.cos_i = np.cos(self.i)
+        self.sin_i = np.sin(self.i)
+        self.cos_omega = ux = np.cos(self.omega)
+        self.sin_omega = uy = np.sin(self.omega)
+        self.cos_bar_omega = np.cos(self.bar_omega)
+        self.sin_bar_omega = np.sin(self.bar_omega)
 
         self.rot_mat = np.dot(
             np.array(
-                [np.cos(self.i) + ux**2*(1-np.cos(self.i)),
-                 ux*uy*(1-np.cos(self.i)),
-                 uy*np.sin(self.i),
-                 ux*uy*(1-np.cos(self.i)),
-                 np.cos(self.i) + uy**2*(1-np.cos(self.i)),
-                 -ux*np.sin(self.i),
-                 -uy*np.sin(self.i),
-                 ux*np.sin(self.i),
-                 np.cos(self.i)]
+                [self.cos_i + ux**2*(1-self.cos_i),
+                 ux*uy*(1-self.cos_i),
+                 uy*self.sin_i,
+                 ux*uy*(1-self.cos_i),
+                 self.cos_i + uy**2*(1-self.cos_i),
+                 -ux*self.sin_i,
+                 -uy*self.sin_i,
+                 ux*self.sin_i,
+                 self.cos_i]
             ).reshape(3, 3),
             np.array(
-                [np.cos(self.bar_omega), -np.sin(self.bar_omega), 0,
-                 np.sin(self.bar_omega), np.cos(self.bar_omega), 0,
+                [self.cos_bar_omega, -self.sin_bar_omega, 0,
+                 self.sin_bar_omega, self.cos_bar_omega, 0,
                  0, 0, 1]
             ).reshape(3, 3)
         )
@@ -50,190 +142,203 @@ class Planet:
     def get_time_in_period(self, time):
         return time % self.period
 
-    def position(self, time):
+    def positions_2d(self, times):
+        ecc_an = self.eccentric_annomalies(times)
+        return np.stack([
+            self.a*(np.cos(ecc_an) - self.epsilon),
+            self.a*self.sqrt_epsilon*np.sin(ecc_an)
+        ], axis=-1)
 
-        time = self.get_time_in_period(time)
-        eccentric_annomaly = utils.eccentric_annomaly(
-            self.period,
-            self.epsilon,
-            time
-        )
-
-        position = np.dot(self.rot_mat, [
-            self.a*(np.cos(eccentric_annomaly) - self.epsilon)[0],
-            self.a*np.sqrt(1-self.epsilon**2)*np.sin(eccentric_annomaly)[0],
-            0
-        ])
+    def positions(self, times):
+        return np.dot(self.positions_2d(times), self.rot_mat[:, :2].T)
 
-        return position
+    def position(self, time):
+        return self.positions(time)
 
     def position_2d(self, time):
+        return self.positions_2d(time)
 
-        time = self.get_time_in_period(time)
-        eccentric_annomaly = utils.eccentric_annomaly(
-            self.period,
-            self.epsilon,
-            time
-        )
-
-        position = [
-            self.a*(np.cos(eccentric_annomaly) - self.epsilon)[0],
-            self.a*np.sqrt(1-self.epsilon**2)*np.sin(eccentric_annomaly)[0]
-        ]
-
-        return position
+    def distances_to_sun(self, times):
+        ecc_an = self.eccentric_annomalies(times)
+        return self.a*(1 - self.epsilon*np.cos(ecc_an))
 
     def distance_to_sun(self, time):
-        return np.linalg.norm(self.position(time))
+        return float(self.distances_to_sun(time))
 
-    def speed(self, time):
+    def orbital_speeds(self, period, times):
+        ecc_an = utils.eccentric_annomalies(period, self.epsilon, times)
+        quotient = 2*np.pi*self.a/(period*(1-self.epsilon*np.cos(ecc_an)))
+        return np.stack([
+            -quotient*np.sin(ecc_an),
+            quotient*self.sqrt_epsilon*np.cos(ecc_an)
+        ], axis=-1)
 
-        time = self.get_time_in_period(time)
-        eccentric_annomaly = utils.eccentric_annomaly(
-            self.period,
-            self.epsilon,
-            time
-        )
-
-        denom = self.period*(1-self.epsilon*np.cos(eccentric_annomaly))
-        quotient = 2*np.pi*self.a/denom
+    def speeds_2d(self, times):
+        times = self.get_time_in_period(np.asarray(times, dtype=float))
+        return self.orbital_speeds(self.period, times)
 
-        speed = np.dot(self.rot_mat, [
-            (-quotient*np.sin(eccentric_annomaly))[0],
-            (quotient *
-             np.sqrt(1 - self.epsilon**2)*np.cos(eccentric_annomaly))[0],
-            0
-        ])
+    def speeds(self, times):
+        return np.dot(self.speeds_2d(times), self.rot_mat[:, :2].T)
 
-        return speed
+    def speed(self, time):
+        return self.speeds(time)
 
     def speed_2d(self, time):
+        return self.speeds_2d(time)
 
-        time = self.get_time_in_period(time)
-        eccentric_annomaly = utils.eccentric_annomaly(
-            self.period,
-            self.epsilon,
-            time
-        )
-
-        denom = self.period*(1-self.epsilon*np.cos(eccentric_annomaly))
-        quotient = 2*np.pi*self.a/denom
-
-        speed = [
-            (-quotient*np.sin(eccentric_annomaly))[0],
-            (quotient *
-             np.sqrt(1 - self.epsilon**2)*np.cos(eccentric_annomaly))[0]
-        ]
-
-        return speed
+    def speeds_2bodies(self, times):
+        return self.orbital_speeds(self.period_2bodies,
+                                   np.asarray(times, dtype=float))
 
     def speed_2bodies(self, time):
-        G = 6.674*10**(-11)
-        sun_mass = 1.989*10**30
-        mu = 8.9546188*10**(-25)*G*sun_mass**3/(self.mass + sun_mass)**2
-        period = np.sqrt(4*np.pi**2*self.a**3/mu)
-
-        time = self.get_time_in_period(time)
-        eccentric_annomaly = utils.eccentric_annomaly(
-            period,
-            self.epsilon,
-            time
-        )
-
-        denom = period*(1-self.epsilon*np.cos(eccentric_annomaly))
-        quotient = 2*np.pi*self.a/denom
-
-        speed = [
-            (-quotient*np.sin(eccentric_annomaly))[0],
-            (quotient *
-             np.sqrt(1 - self.epsilon**2)*np.cos(eccentric_annomaly))[0]
-        ]
+        return self.speeds_2bodies(time)
 
-        return speed
+    def speed_modules(self, times):
+        return np.linalg.norm(self.speeds_2d(times), axis=-1)
 
     def speed_module(self, time):
-        return np.linalg.norm(self.speed(time))
+        return float(self.speed_modules(time))
 
     def real_annomaly_deriv(self, t, theta):
-        num = self.c*(1 + self.epsilon*np.cos(theta))**2
-        denom = (self.a**2*(1 - self.epsilon**2)**2)
-        return num/denom
+        return backend.get().real_annomaly_deriv(theta, self.deriv_factor,
+                                                 self.epsilon)
 
     def real_annomaly_2bodies_deriv(self, t, theta):
-        G = 6.674*10**(-11)
-        sun_mass = 1.989*10**30
-        mu = 8.9546188*10**(-25)*G*sun_mass**3/(self.mass + sun_mass)**2
-        c = np.sqrt(mu*self.a*(1-self.epsilon**2))
-        num = c*(1 + self.epsilon*np.cos(theta))**2
-        denom = (self.a**2*(1 - self.epsilon**2)**2)
-        return num/denom
-
-    def position_2bodies(self, time):
-        theta = utils.runge_kutta(self.real_annomaly_2bodies_deriv,
-                                  0, 0, time, 4000)
+        return backend.get().real_annomaly_deriv(
+            theta, self.deriv_factor_2bodies, self.epsilon)
+
+    def real_annomalies_2bodies(self, times):
+        return utils.real_annomalies(self.period_2bodies,
+                                     self.epsilon,
+                                     np.asarray(times, dtype=float))
+
+    def positions_2bodies(self, times):
+        theta = self.real_annomalies_2bodies(times)
+        constant = self.a*(1 - self.epsilon**2)/(1 + self.epsilon*np.cos(theta))
+        return np.stack([constant*np.cos(theta), constant*np.sin(theta)],
+                        axis=-1)
+
+    def integrated_real_annomaly_2bodies(self, times):
+        if self.trajectory_2bodies is None:
+            self.trajectory_2bodies = trajectory.TrajectoryCache(
+                self.real_annomaly_2bodies_deriv, 0, 0,
+                self.period_2bodies/8)
+        return self.trajectory_2bodies(times)
+
+    def position_2bodies(self, time, method='kepler'):
+        if method == 'rk4':
+            theta = utils.integrate_real_annomaly(
+                self.deriv_factor_2bodies, self.epsilon, 0, 0, time, 4000)
+        elif method == 'integrate':
+            theta = self.integrated_real_annomaly_2bodies(time)
+        else:
+            theta = self.real_annomalies_2bodies(time)
 
         constant = self.a*(1 - self.epsilon**2)/(1 + self.epsilon*np.cos(theta))
         return [constant*np.cos(theta), constant*np.sin(theta)]
 
-    def real_annomaly(self, time):
+    def real_annomalies(self, times):
+        times = self.get_time_in_period(np.asarray(times, dtype=float))
+        return utils.real_annomalies(self.period, self.epsilon, times)
+
+    def integrated_real_annomaly(self, times):
+        if self.trajectory is None:
+            self.trajectory = trajectory.TrajectoryCache(
+                self.real_annomaly_deriv, 0, 0, self.period/8)
+        times = self.get_time_in_period(np.asarray(times, dtype=float))
+        return self.trajectory(times)
+
+    def real_annomaly(self, time, method='kepler'):
         time = self.get_time_in_period(time)
-        return utils.runge_kutta(self.real_annomaly_deriv, 0, 0, time, 5000)
+        if method == 'rk4':
+            return utils.integrate_real_annomaly(
+                self.deriv_factor, self.epsilon, 0, 0, time, 5000)
+        if method == 'integrate':
+            return float(self.integrated_real_annomaly(time))
+        return float(self.real_annomalies(time))
 
     def energy(self):
         return -self.c**2/(2*self.a**2*(1-self.epsilon**2))
 
+    def energies_from_time(self, times):
+        return (self.speed_modules(times)**2/2 -
+                self.mu/self.distances_to_sun(times))
+
     def energy_from_time(self, time):
-        return (self.speed_module(time)**2/2 -
-                self.mu/self.distance_to_sun(time))
+        return float(self.energies_from_time(time))
+
+    def angular_moments_from_time(self, times):
+        times = self.get_time_in_period(np.asarray(times, dtype=float))
+        real_annomaly = self.real_annomalies(times)
+        moment = (self.distances_to_sun(times)**2 *
+                  self.real_annomaly_deriv(times, real_annomaly))
+        return np.multiply.outer(moment, self.rot_mat[:, 2])
 
     def angular_moment_from_time(self, time):
-        time = self.get_time_in_period(time)
-        real_annomaly = self.real_annomaly(time)
-        return np.dot(self.rot_mat,
-                      [0, 0, (self.distance_to_sun(time)**2 *
-                              self.real_annomaly_deriv(time, real_annomaly))])
+        return self.angular_moments_from_time(time)
 
     def real_annomaly_from_eccentric(self, time):
-        ecc_an = utils.eccentric_annomaly(self.period,
-                                          self.epsilon,
-                                          time)
-        real_an = np.arccos((np.cos(ecc_an)[0] - self.epsilon) /
-                            (1 - self.epsilon*np.cos(ecc_an)[0]))
-        real_an = real_an if 2*time < self.period else 2*np.pi - real_an
-        return real_an
-
-    def get_orbit(self, npoints):
-        if self.orbit is None:
-            ts = list(np.arange(0, self.period, self.period/npoints))
-            self.orbit = [self.position(t) for t in ts]
-            self.orbit.append(self.orbit[0])
-            self.orbit = np.asarray(self.orbit)
-        return self.orbit
+        ecc_an = self.eccentric_annomaly(time)
+        return float(kepler.real_from_eccentric(ecc_an, self.epsilon))
+
+    def orbit_key(self, model):
+        if model == '3d':
+            return (self.epsilon, self.a, self.period,
+                    self.i, self.omega, self.bar_omega)
+        if model == '2d':
+            return (self.epsilon, self.a, self.period)
+        return (self.epsilon, self.a, self.mass)
+
+    def sample_orbit(self, npoints, model='3d'):
+        period = self.period_2bodies if model == '2bodies' else self.period
+        ts = np.linspace(0, period, npoints, endpoint=False)
+        if model == '3d':
+            orbit = self.positions(ts)
+        elif model == '2d':
+            orbit = self.positions_2d(ts)
+        else:
+            orbit = self.positions_2bodies(ts)
+        return np.concatenate([orbit, orbit[:1]])
+
+    def get_orbit(self, npoints, model='3d'):
+        key = (self.orbit_key(model), npoints, model)
+        return orbit_cache.get(key, lambda: self.sample_orbit(npoints, model))
+
+    def adaptive_eccentric_annomalies(self, tol, oversample=4096):
+        u = np.linspace(0, 2*np.pi, oversample + 1)
+        b = self.a*self.sqrt_epsilon
+        speed = np.sqrt(self.a**2*np.sin(u)**2 + b**2*np.cos(u)**2)
+        density = np.sqrt(self.a*b/(8*tol*speed))
+        cumulative = np.concatenate([
+            [0], np.cumsum((density[1:] + density[:-1])*np.diff(u)/2)])
+        nsegments = max(int(np.ceil(cumulative[-1])), 8)
+        return np.interp(np.linspace(0, cumulative[-1], nsegments + 1),
+                         cumulative, u)
+
+    def sample_adaptive_orbit(self, tol, model='3d'):
+        ecc_an = self.adaptive_eccentric_annomalies(tol)
+        orbit = np.stack([
+            self.a*(np.cos(ecc_an) - self.epsilon),
+            self.a*self.sqrt_epsilon*np.sin(ecc_an)
+        ], axis=-1)
+        orbit[-1] = orbit[0]
+        if model == '3d':
+            return np.dot(orbit, self.rot_mat[:, :2].T)
+        return orbit
+
+    def get_adaptive_orbit(self, tol, model='3d'):
+        key = (self.orbit_key(model), 'adaptive', tol, model)
+        return orbit_cache.get(key,
+                               lambda: self.sample_adaptive_orbit(tol, model))
 
     def get_orbit_2d(self, npoints):
-        if self.orbit_2d is None:
-            ts = list(np.arange(0, self.period, self.period/npoints))
-            self.orbit_2d = [self.position(t) for t in ts]
-            self.orbit_2d.append(self.orbit_2d[0])
-            self.orbit_2d = np.asarray(self.orbit_2d)
-        return self.orbit_2d
+        return self.get_orbit(npoints, '2d')
 
     def get_orbit_2bodies(self, npoints):
-        
-        if self.orbit_2bodies is None:
-            G = 6.674*10**(-11)
-            sun_mass = 1.989*10**30
-            mu = 8.9546188*10**(-25)*G*sun_mass**3/(self.mass + sun_mass)**2
-            period = np.sqrt(4*np.pi**2*self.a**3/mu)
-            ts = list(np.arange(0, period, period/npoints))
-            self.orbit_2bodies = [self.position_2bodies(t) for t in ts]
-            self.orbit_2bodies.append(self.orbit_2bodies[0])
-            self.orbit_2bodies = np.asarray(self.orbit_2bodies)
-        return self.orbit_2bodies
+        return self.get_orbit(npoints, '2bodies')
 
     def mass_center(self, time):
-        sun_mass = 1.989*10**30
-        quotient = self.mass/(self.mass + sun_mass)
+        quotient = self.mass/(self.mass + SUN_MASS)
         pos = np.array(self.position_2bodies(0))
         speed = np.array(self.speed_2bodies(0))
         alpha = quotient*pos
@@ -253,13 +358,206 @@ class Planet:
                                         self.epsilon,
                                         time)[0]
 
-    def eccentric_annomaly_bessel(self, time, nfuncs):
-        time = self.get_time_in_period(time)
-        ji = 2*np.pi*time/self.period
-        ecc_an = ji
-
-        for i in range(nfuncs):
-            bessel = sp.jv((i+1), (i+1)*self.epsilon)
-            ecc_an += (2/(i+1))*bessel*np.sin((i+1)*ji)
-
-        return ecc_an
+    def eccentric_annomalies(self, times):
+        times = self.get_time_in_period(np.asarray(times, dtype=float))
+        return utils.eccentric_annomalies(self.period,
+                                          self.epsilon,
+                                          times)
+
+    def iter_eccentric_annomalies(self, times, tol=1e-14):
+        jis = (2*np.pi*time/self.period for time in times)
+        for ecc_an, iterations in kepler.continuation(jis, self.epsilon, tol):
+            yield float(ecc_an), int(iterations)
+
+    def state(self, time):
+        return PlanetState(self, time)
+
+    def eccentric_annomalies_bessel(self, times, nfuncs=None, tol=1e-12):
+        times = self.get_time_in_period(np.asarray(times, dtype=float))
+        return kepler.eccentric_from_bessel(2*np.pi*times/self.period,
+                                            self.epsilon, nfuncs, tol)
+
+    def eccentric_annomaly_bessel(self, time, nfuncs=None, tol=1e-12):
+        return float(self.eccentric_annomalies_bessel(time, nfuncs, tol))
+
+
+class PlanetState:
+    def __init__(self, planet, time):
+        self.planet = planet
+        self.time = time
+        time = planet.get_time_in_period(float(time))
+
+        ecc_an = float(utils.eccentric_annomalies(planet.period,
+                                                  planet.epsilon, time))
+        cos_u = np.cos(ecc_an)
+        sin_u = np.sin(ecc_an)
+        self.eccentric_annomaly = ecc_an
+        self.real_annomaly = float(kepler.real_from_eccentric(
+            ecc_an, planet.epsilon))
+
+        self.position_2d = np.array([planet.a*(cos_u - planet.epsilon),
+                                     planet.a*planet.sqrt_epsilon*sin_u])
+        self.position = np.dot(planet.rot_mat[:, :2], self.position_2d)
+        self.distance_to_sun = planet.a*(1 - planet.epsilon*cos_u)
+
+        quotient = 2*np.pi*planet.a/(planet.period*(1-planet.epsilon*cos_u))
+        self.speed_2d = np.array([-quotient*sin_u,
+                                  quotient*planet.sqrt_epsilon*cos_u])
+        self.speed = np.dot(planet.rot_mat[:, :2], self.speed_2d)
+        self.speed_module = np.linalg.norm(self.speed_2d)
+
+        self.real_annomaly_deriv = planet.real_annomaly_deriv(
+            time, self.real_annomaly)
+        self.energy = (self.speed_module**2/2 -
+                       planet.mu/self.distance_to_sun)
+        self.angular_moment = (self.distance_to_sun**2 *
+                               self.real_annomaly_deriv *
+                               planet.rot_mat[:, 2])
+        self.angular_moment_module = np.linalg.norm(self.angular_moment)
+
+    def eccentric_annomaly_bessel(self, nfuncs=None, tol=1e-12):
+        return float(kepler.eccentric_from_bessel(
+            2*np.pi*self.planet.get_time_in_period(float(self.time)) /
+            self.planet.period,
+            self.planet.epsilon, nfuncs, tol))
+
+
+def planet_array(name):
+    attr = '_' + name
+
+    def getter(self):
+        versions = [planet.version for planet in self.planets]
+        if versions != self.versions:
+            self.update(versions)
+        return getattr(self, attr)
+
+    return property(getter)
+
+
+class PlanetSet:
+    epsilon = planet_array('epsilon')
+    sqrt_epsilon = planet_array('sqrt_epsilon')
+    a = planet_array('a')
+    period = planet_array('period')
+    mass = planet_array('mass')
+    rot_mat = planet_array('rot_mat')
+
+    def __init__(self, planets):
+        self.planets = list(planets)
+        self.names = [planet.name for planet in self.planets]
+        self.versions = None
+
+    def update(self, versions):
+        self.versions = versions
+        self._epsilon = np.array([planet.epsilon for planet in self.planets])
+        self._sqrt_epsilon = np.array([planet.sqrt_epsilon
+                                       for planet in self.planets])
+        self._a = np.array([planet.a for planet in self.planets])
+        self._period = np.array([planet.period for planet in self.planets])
+        self._mass = np.array([planet.mass for planet in self.planets])
+        self._rot_mat = np.array([planet.rot_mat for planet in self.planets])
+
+    def __len__(self):
+        return len(self.planets)
+
+    def __iter__(self):
+        return iter(self.planets)
+
+    def __getitem__(self, index):
+        return self.planets[index]
+
+    def get_time_in_period(self, times):
+        times = np.asarray(times, dtype=float)
+        return times % self.period.reshape(-1, 1)
+
+    def eccentric_annomalies(self, times):
+        return utils.eccentric_annomalies(self.period.reshape(-1, 1),
+                                          self.epsilon.reshape(-1, 1),
+                                          self.get_time_in_period(times))
+
+    def iter_eccentric_annomalies(self, times, tol=1e-14):
+        jis = (2*np.pi*time/self.period for time in times)
+        return kepler.continuation(jis, self.epsilon, tol)
+
+    def positions_2d(self, times):
+        ecc_an = self.eccentric_annomalies(times)
+        a = self.a.reshape(-1, 1)
+        epsilon = self.epsilon.reshape(-1, 1)
+        return np.stack([
+            a*(np.cos(ecc_an) - epsilon),
+            a*self.sqrt_epsilon.reshape(-1, 1)*np.sin(ecc_an)
+        ], axis=-1)
+
+    def positions(self, times):
+        return np.einsum('pij,ptj->pti', self.rot_mat[:, :, :2],
+                         self.positions_2d(times))
+
+    def speeds_2d(self, times):
+        ecc_an = self.eccentric_annomalies(times)
+        a = self.a.reshape(-1, 1)
+        epsilon = self.epsilon.reshape(-1, 1)
+        period = self.period.reshape(-1, 1)
+        quotient = 2*np.pi*a/(period*(1-epsilon*np.cos(ecc_an)))
+        return np.stack([
+            -quotient*np.sin(ecc_an),
+            quotient*self.sqrt_epsilon.reshape(-1, 1)*np.cos(ecc_an)
+        ], axis=-1)
+
+    def speeds(self, times):
+        return np.einsum('pij,ptj->pti', self.rot_mat[:, :, :2],
+                         self.speeds_2d(times))
+
+
+EPHEMERIS_VERSION = 1
+
+
+class EphemerisStore:
+    def __init__(self, directory='ephemerides'):
+        self.directory = directory
+
+    def key(self, planets, times, model='3d'):
+        digest = hashlib.sha1()
+        digest.update('{}:{}'.format(EPHEMERIS_VERSION, model).encode())
+        for planet in planets:
+            digest.update(np.array(planet.orbit_key(model)).tobytes())
+        digest.update(np.ascontiguousarray(times, dtype=float).tobytes())
+        return digest.hexdigest()
+
+    def path(self, planets, times, model='3d'):
+        return os.path.join(self.directory, 'ephemeris_v{}_{}.npy'.format(
+            EPHEMERIS_VERSION, self.key(planets, times, model)))
+
+    def compute(self, planets, times, model='3d'):
+        times = np.asarray(times, dtype=float)
+        if model == '2bodies':
+            table = np.array([planet.positions_2bodies(times)
+                              for planet in planets])
+        elif model == '2d':
+            table = PlanetSet(planets).positions_2d(times)
+        else:
+            table = PlanetSet(planets).positions(times)
+        return np.ascontiguousarray(table.transpose(1, 0, 2))
+
+    def load(self, planets, times, model='3d'):
+        path = self.path(planets, times, model)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def save(self, planets, times, table, model='3d'):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        path = self.path(planets, times, model)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            np.save(f, table)
+        os.replace(tmp_path, path)
+        return path
+
+    def get(self, planets, times, model='3d'):
+        table = self.load(planets, times, model)
+        if table is None:
+            self.save(planets, times, self.compute(planets, times, model),
+                      model)
+            table = self.load(planets, times, model)
+        return table
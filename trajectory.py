@@ -0,0 +1,94 @@
+from collections import OrderedDict
+import numpy as np
+import integrators
+
+
+class TrajectoryCache:
+
+    def __init__(self, func, t_0, x_0, segment_length, max_bytes=2**20,
+                 rtol=1e-10, atol=1e-12):
+        self.func = func
+        self.t_0 = t_0
+        self.segment_length = segment_length
+        self.max_bytes = max_bytes
+        self.rtol = rtol
+        self.atol = atol
+        self.checkpoints = {0: np.array(x_0, dtype=float)}
+        self.segments = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def segment_index(self, times):
+        return np.floor((times - self.t_0)/self.segment_length).astype(int)
+
+    def segment_bounds(self, index):
+        start = self.t_0 + index*self.segment_length
+        return start, start + self.segment_length
+
+    def nearest_checkpoint(self, index):
+        if index >= 0:
+            return max(k for k in self.checkpoints if 0 <= k <= index)
+        return min(k for k in self.checkpoints if index + 1 <= k <= 0)
+
+    def integrate_segment(self, index, forward):
+        start, end = self.segment_bounds(index)
+        if forward:
+            x_0 = self.checkpoints[index]
+            solution = integrators.dormand_prince(self.func, start, x_0, end,
+                                                  self.rtol, self.atol)
+            self.checkpoints[index + 1] = solution.xs[-1]
+        else:
+            x_0 = self.checkpoints[index + 1]
+            solution = integrators.dormand_prince(self.func, end, x_0, start,
+                                                  self.rtol, self.atol)
+            self.checkpoints[index] = solution.xs[-1]
+        self.store(index, solution)
+        return solution
+
+    def size(self, solution):
+        return (solution.coefs.nbytes + solution.ts.nbytes +
+                solution.xs.nbytes)
+
+    def store(self, index, solution):
+        self.segments[index] = solution
+        self.nbytes += self.size(solution)
+        while self.nbytes > self.max_bytes and len(self.segments) > 1:
+            _, evicted = self.segments.popitem(last=False)
+            self.nbytes -= self.size(evicted)
+
+    def segment(self, index):
+        if index in self.segments:
+            self.hits += 1
+            self.segments.move_to_end(index)
+            return self.segments[index]
+
+        self.misses += 1
+        start = self.nearest_checkpoint(index)
+        if index >= 0:
+            for k in range(start, index):
+                if k + 1 not in self.checkpoints:
+                    self.integrate_segment(k, forward=True)
+            return self.integrate_segment(index, forward=True)
+
+        for k in range(start - 1, index, -1):
+            if k not in self.checkpoints:
+                self.integrate_segment(k, forward=False)
+        return self.integrate_segment(index, forward=False)
+
+    def __call__(self, times):
+        times = np.asarray(times, dtype=float)
+        flat = times.ravel()
+        indices = self.segment_index(flat)
+        result = np.empty(flat.shape + self.checkpoints[0].shape)
+
+        for index in np.unique(indices):
+            mask = indices == index
+            result[mask] = self.segment(int(index))(flat[mask])
+
+        return result.reshape(times.shape + self.checkpoints[0].shape)
+
+    def clear(self):
+        self.checkpoints = {0: self.checkpoints[0]}
+        self.segments.clear()
+        self.nbytes = 0